@@ -1,7 +1,7 @@
 """This module defines a shoe inventory system that can be interacted with."""
 import csv
 import os
-from tabulate.tabulate import tabulate
+from tabulate.tabulate import PagedTable, Tabulator
 #from __future__ import annotations
 
 # Note on original submision:
@@ -160,6 +160,19 @@ class Shoe:
 # a lot of the time but could have it's uses
 shoe_list: list[Shoe] = []
 
+# tables are redrawn every time the user views them so set up the
+# renderers once. The column types are known so tabulate doesn't need to
+# work them out. Cost has already been formatted as a string.
+shoe_table_options = dict(tablefmt='fancy_grid',
+                          showindex='always',
+                          coltypes=[int, str, str, str, str, int])
+value_table = Tabulator(tablefmt='fancy_grid',
+                        numalign="center",
+                        coltypes=[str, str, str])
+
+# number of shoes in each table printed when viewing all shoes
+PAGE_SIZE = 25
+
 # ensure we can get path to inventry.txt even if user is in different directory
 # when they execute script
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -412,17 +425,23 @@ def append_shoe_data(shoe_data: list) -> None:
 
 
 def view_all() -> None:
-    """Iterate over shoe list and print details of shoes using tabulate."""
+    """Iterate over shoe list and print details of shoes using tabulate.
+
+    Shoes are printed a page at a time, one page after another. Every page
+    has the same column widths so they line up with each other.
+    """
     shoes = get_shoe_details(shoe_list)
     # format cost as currency
     for shoe in shoes:
         shoe[3] = f"R{shoe[3]:.2f}"
 
-    print(tabulate(shoes,
-                   headers=["Index", "Country",
-                            "Code", "Product", "Cost", "Quantity"],
-                   showindex='always',
-                   tablefmt='fancy_grid'))
+    pages = PagedTable(shoes,
+                       headers=["Index", "Country",
+                                "Code", "Product", "Cost", "Quantity"],
+                       **shoe_table_options)
+    # always print at least one page so an empty inventory shows the headers
+    for offset in range(0, max(len(pages), 1), PAGE_SIZE):
+        print(pages.page(offset, PAGE_SIZE))
 
 
 def get_shoe_details(shoes) -> list[list]:
@@ -675,10 +694,7 @@ def value_per_item():
     print("\nTotal Value of shoes:")
     headers = ["Code", "Product", "Total Value"]
 
-    print(tabulate(shoes,
-                   headers=headers,
-                   tablefmt='fancy_grid',
-                   numalign="center"))
+    print(value_table(shoes, headers=headers))
 
     # print menu to allow user to interact with list
     value_per_item_menu()
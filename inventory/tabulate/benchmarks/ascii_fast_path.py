@@ -0,0 +1,86 @@
+"""Time tabulate on plain ASCII tables with wide-character mode on and off.
+
+Wide-character support is only turned on for the columns which need it,
+so a plain ASCII table should take as long with WIDE_CHARS_MODE on as with
+it off. The same table with a wide character in every column shows what
+the wcwidth path costs, which every table used to pay for while
+WIDE_CHARS_MODE was on.
+
+Usage:
+
+    python inventory/tabulate/benchmarks/ascii_fast_path.py [--rows N]
+
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+# make the vendored package importable when run as a script
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from tabulate import tabulate as tabulate_module  # noqa: E402
+
+
+def make_table(nrows, wide=False):
+    """Rows like those of inventory.txt; `wide` adds a CJK country."""
+    rng = random.Random(0)
+    countries = ["South Africa", "China", "Vietnam", "United States", "Pakistan"]
+    if wide:
+        countries.append("中国")
+    rows = []
+    for i in range(nrows):
+        product = "Product %d" % rng.randint(0, 999)
+        if wide and i == 0:
+            product += " 模型"
+        rows.append(
+            [
+                rng.choice(countries),
+                "SKU%05d" % rng.randint(0, 99999),
+                product,
+                round(rng.uniform(100, 5000), 2),
+                rng.randint(0, 100),
+            ]
+        )
+    return rows
+
+
+def best_time(fn, repeat):
+    return min(timeit.repeat(fn, number=1, repeat=repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--tablefmt", default="simple")
+    args = parser.parse_args()
+
+    if tabulate_module.wcwidth is None:
+        sys.exit("wcwidth is not installed, there is no wide-character mode")
+
+    headers = ["Country", "Code", "Product", "Cost", "Quantity"]
+    ascii_rows = make_table(args.rows)
+    wide_rows = make_table(args.rows, wide=True)
+
+    def render(rows):
+        return lambda: tabulate_module.tabulate(rows, headers, args.tablefmt)
+
+    cases = [
+        ("ascii, WIDE_CHARS_MODE off", ascii_rows, False),
+        ("ascii, WIDE_CHARS_MODE on", ascii_rows, True),
+        ("wide chars, WIDE_CHARS_MODE on", wide_rows, True),
+    ]
+    saved_mode = tabulate_module.WIDE_CHARS_MODE
+    try:
+        for name, rows, mode in cases:
+            tabulate_module.WIDE_CHARS_MODE = mode
+            seconds = best_time(render(rows), args.repeat)
+            print(f"{name:<32} {seconds:8.3f} s")
+    finally:
+        tabulate_module.WIDE_CHARS_MODE = saved_mode
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Time importing tabulate in a new interpreter, as a short-lived script does.
+
+Every case runs a fresh Python process a number of times, which imports
+the module, or imports it and renders a small table in one of a few
+formats. The time of a case is measured in the process itself, so it
+doesn't include starting the interpreter, and the number of modules loaded
+by the case is recorded too. The results can be written to a JSON file and
+compared with those of an earlier run.
+
+Usage:
+
+    python inventory/tabulate/benchmarks/importtime.py --output before.json
+    ... change tabulate ...
+    python inventory/tabulate/benchmarks/importtime.py --output after.json \\
+        --compare before.json
+
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+
+# the vendored package, put on the path of every new interpreter
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+RENDER = (
+    "import tabulate.tabulate as t; t.tabulate(["
+    "['Nike Air', 'South Africa', 12.5, 7], ['Vans', 'China', 99.0, 12]"
+    "], tablefmt=%r)"
+)
+
+CASES = {
+    "import": "import tabulate.tabulate",
+    "simple": RENDER % "simple",
+    "grid": RENDER % "grid",
+    "html": RENDER % "html",
+    "latex": RENDER % "latex",
+}
+
+CHILD = """\
+import sys, time
+modules = len(sys.modules)
+started = time.perf_counter()
+{code}
+print(time.perf_counter() - started, len(sys.modules) - modules)
+"""
+
+
+def run_once(code):
+    """Seconds taken by `code` in a new interpreter, and modules it loaded."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [PACKAGE_DIR] + ([env["PYTHONPATH"]] if env.get("PYTHONPATH") else [])
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD.format(code=code)],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    seconds, modules = output.split()
+    return float(seconds), int(modules)
+
+
+def run(cases, repeat):
+    results = []
+    for name in cases:
+        runs = [run_once(CASES[name]) for _ in range(repeat)]
+        times = [seconds for seconds, _ in runs]
+        result = {
+            "case": name,
+            "best": min(times),
+            "median": statistics.median(times),
+            "modules": runs[-1][1],
+        }
+        results.append(result)
+        print(
+            f"{name:<10} {result['best'] * 1000:8.2f} ms best "
+            f"{result['median'] * 1000:8.2f} ms median "
+            f"{result['modules']:4d} modules"
+        )
+    return results
+
+
+def environment():
+    return {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+    }
+
+
+def compare(results, baseline):
+    """Print the time of every case relative to the same case in `baseline`."""
+    before = {result["case"]: result["best"] for result in baseline["results"]}
+    print()
+    print(f"{'case':<10} {'before':>10} {'after':>10} {'ratio':>7}")
+    for result in results:
+        name = result["case"]
+        if name not in before or not before[name]:
+            continue
+        ratio = result["best"] / before[name]
+        print(
+            f"{name:<10} {before[name] * 1000:8.2f}ms "
+            f"{result['best'] * 1000:8.2f}ms {ratio:7.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--cases", nargs="+", default=list(CASES), choices=list(CASES),
+        help="cases to run (default: all of them)",
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON results of an earlier run")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    results = run(args.cases, args.repeat)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {"environment": environment(), "results": results}, f, indent=1
+            )
+    if baseline is not None:
+        compare(results, baseline)
+
+
+if __name__ == "__main__":
+    main()
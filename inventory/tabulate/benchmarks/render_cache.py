@@ -0,0 +1,132 @@
+"""Time tabulate's cache of rendered tables against rendering them.
+
+For tables of a few sizes and kinds of data, every case times rendering
+the table with the cache off, returning it from the cache when the data
+is fingerprinted (pickled and hashed on every call), and returning it
+from the cache for a `cache_key` given by the caller. A hit is only worth
+having if it takes less time than rendering the table does.
+
+Usage:
+
+    python inventory/tabulate/benchmarks/render_cache.py [--output FILE]
+
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import sys
+import timeit
+
+# make the vendored package importable when run as a script
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from tabulate import tabulate as tabulate_module  # noqa: E402
+from tabulate.version import __version__  # noqa: E402
+
+COUNTRIES = ["South Africa", "China", "Vietnam", "United States", "Pakistan"]
+
+
+def _numeric(rng, nrows):
+    return [[rng.uniform(0, 1e6), rng.randint(0, 100), i] for i in range(nrows)]
+
+
+def _text(rng, nrows):
+    return [
+        [rng.choice(COUNTRIES), "SKU%05d" % rng.randint(0, 99999), "Product"]
+        for _ in range(nrows)
+    ]
+
+
+KINDS = {"numeric": _numeric, "text": _text}
+
+
+def best(fn, repeat):
+    number = 10
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+
+
+def run(sizes, kinds, tablefmt, repeat):
+    results = []
+    saved_size = tabulate_module.RENDER_CACHE_SIZE
+    try:
+        for kind in kinds:
+            for nrows in sizes:
+                rows = KINDS[kind](random.Random(nrows), nrows)
+                tabulate_module.RENDER_CACHE_SIZE = 0
+                render = best(
+                    lambda: tabulate_module.tabulate(rows, tablefmt=tablefmt),
+                    repeat,
+                )
+                tabulate_module.RENDER_CACHE_SIZE = 8
+                tabulate_module.render_cache_clear()
+                fingerprint_hit = best(
+                    lambda: tabulate_module.tabulate(rows, tablefmt=tablefmt),
+                    repeat,
+                )
+                key_hit = best(
+                    lambda: tabulate_module.tabulate(
+                        rows, tablefmt=tablefmt, cache_key=("stock", 1)
+                    ),
+                    repeat,
+                )
+                result = {
+                    "kind": kind,
+                    "rows": nrows,
+                    "render": render,
+                    "fingerprint_hit": fingerprint_hit,
+                    "key_hit": key_hit,
+                }
+                results.append(result)
+                print(
+                    f"{kind}/{nrows:<8} render {render * 1e3:10.3f} ms  "
+                    f"fingerprint hit {fingerprint_hit * 1e3:10.3f} ms "
+                    f"({render / fingerprint_hit:6.1f}x)  "
+                    f"key hit {key_hit * 1e3:8.3f} ms"
+                )
+    finally:
+        tabulate_module.RENDER_CACHE_SIZE = saved_size
+        tabulate_module.render_cache_clear()
+    return results
+
+
+def environment():
+    return {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "tabulate": __version__,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1, 10, 100, 1000, 10000],
+        help="numbers of rows (default: 1 10 100 1000 10000)",
+    )
+    parser.add_argument(
+        "--kinds", nargs="+", default=list(KINDS), choices=list(KINDS),
+        help="kinds of data (default: all of them)",
+    )
+    parser.add_argument(
+        "--format", default="simple", choices=tabulate_module.tabulate_formats,
+        metavar="FMT", help="table format (default: simple)",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.kinds, args.format, args.repeat)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {"environment": environment(), "results": results}, f, indent=1
+            )
+
+
+if __name__ == "__main__":
+    main()
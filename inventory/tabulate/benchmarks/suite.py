@@ -0,0 +1,264 @@
+"""Time tabulate over a matrix of table sizes, formats and kinds of data.
+
+Every case renders a table of one kind of data (numbers, text, both,
+multiline cells, ANSI colored cells, wide characters or text wrapped by
+maxcolwidths) with a given number of rows in one of the table formats,
+and records the best of a few runs. The tables of wide characters are
+rendered with wide-character mode both on and off, all the others with
+it off, whether or not wcwidth is installed. The results can be written to a JSON
+file and compared with those of an earlier run, which prints how much
+faster or slower every case has become.
+
+Usage:
+
+    python inventory/tabulate/benchmarks/suite.py --output before.json
+    ... change tabulate ...
+    python inventory/tabulate/benchmarks/suite.py --output after.json \\
+        --compare before.json
+
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import timeit
+
+# make the vendored package importable when run as a script
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from tabulate import tabulate as tabulate_module  # noqa: E402
+from tabulate.version import __version__  # noqa: E402
+
+WORDS = [
+    "shoe", "sneaker", "boot", "running", "leather", "canvas", "size",
+    "restock", "warehouse", "shelf", "before", "friday", "check", "order",
+]
+COUNTRIES = ["South Africa", "China", "Vietnam", "United States", "Pakistan"]
+WIDE_COUNTRIES = ["中国", "日本", "대한민국", "Việt Nam", "ประเทศไทย"]
+COLORS = ["\x1b[31m", "\x1b[32m", "\x1b[33m", "\x1b[1m"]
+
+
+def _numeric(rng, nrows):
+    headers = ["Cost", "Quantity", "Weight", "Rate", "Id"]
+    rows = [
+        [
+            round(rng.uniform(100, 5000), 2),
+            rng.randint(0, 100),
+            rng.uniform(0, 1e6),
+            rng.uniform(-1, 1),
+            i,
+        ]
+        for i in range(nrows)
+    ]
+    return headers, rows, {}
+
+
+def _text(rng, nrows):
+    headers = ["Country", "Code", "Product", "Note"]
+    rows = [
+        [
+            rng.choice(COUNTRIES),
+            "SKU%05d" % rng.randint(0, 99999),
+            "Product %d" % rng.randint(0, 999),
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))),
+        ]
+        for _ in range(nrows)
+    ]
+    return headers, rows, {}
+
+
+def _mixed(rng, nrows):
+    headers = ["Country", "Code", "Product", "Cost", "Quantity"]
+    rows = [
+        [
+            rng.choice(COUNTRIES),
+            "SKU%05d" % rng.randint(0, 99999),
+            "Product %d" % rng.randint(0, 999),
+            round(rng.uniform(100, 5000), 2),
+            rng.randint(0, 100),
+        ]
+        for _ in range(nrows)
+    ]
+    return headers, rows, {}
+
+
+def _multiline(rng, nrows):
+    headers = ["Country", "Address", "Quantity"]
+    rows = [
+        [
+            rng.choice(COUNTRIES),
+            "\n".join(
+                " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+                for _ in range(rng.randint(1, 3))
+            ),
+            rng.randint(0, 100),
+        ]
+        for _ in range(nrows)
+    ]
+    return headers, rows, {}
+
+
+def _ansi(rng, nrows):
+    headers = ["Country", "Status", "Quantity"]
+    rows = [
+        [
+            rng.choice(COUNTRIES),
+            rng.choice(COLORS) + rng.choice(WORDS) + "\x1b[0m",
+            rng.randint(0, 100),
+        ]
+        for _ in range(nrows)
+    ]
+    return headers, rows, {}
+
+
+def _widechar(rng, nrows):
+    headers = ["Country", "Product", "Quantity"]
+    rows = [
+        [
+            rng.choice(WIDE_COUNTRIES),
+            "Product %d" % rng.randint(0, 999),
+            rng.randint(0, 100),
+        ]
+        for _ in range(nrows)
+    ]
+    return headers, rows, {}
+
+
+def _maxcolwidths(rng, nrows):
+    descriptions = [
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 30)))
+        for _ in range(max(1, nrows // 4))
+    ]
+    headers = ["Id", "Description", "Quantity"]
+    rows = [
+        [i, rng.choice(descriptions), rng.randint(0, 100)]
+        for i in range(nrows)
+    ]
+    return headers, rows, {"maxcolwidths": [None, 30, None]}
+
+
+# the kinds of data rendered with wide-character mode on as well as off
+WIDE_KINDS = {"widechar"}
+
+KINDS = {
+    "numeric": _numeric,
+    "text": _text,
+    "mixed": _mixed,
+    "multiline": _multiline,
+    "ansi": _ansi,
+    "widechar": _widechar,
+    "maxcolwidths": _maxcolwidths,
+}
+
+
+def make_table(kind, nrows):
+    """Return the headers, rows and extra tabulate options of a case."""
+    return KINDS[kind](random.Random(nrows), nrows)
+
+
+def case_name(result):
+    name = "%(kind)s/%(tablefmt)s/%(rows)d" % result
+    if result["wide_chars_mode"]:
+        name += "/wide"
+    return name
+
+
+def run(sizes, formats, kinds, repeat):
+    results = []
+    for kind in kinds:
+        for nrows in sizes:
+            headers, rows, options = make_table(kind, nrows)
+            modes = [False, True] if kind in WIDE_KINDS else [False]
+            for tablefmt in formats:
+                for mode in modes:
+                    with tabulate_module.local_settings(wide_chars_mode=mode):
+                        times = timeit.repeat(
+                            lambda: tabulate_module.tabulate(
+                                rows, headers, tablefmt, **options
+                            ),
+                            number=1,
+                            repeat=repeat,
+                        )
+                    result = {
+                        "kind": kind,
+                        "tablefmt": tablefmt,
+                        "rows": nrows,
+                        "wide_chars_mode": mode,
+                        "best": min(times),
+                        "mean": sum(times) / len(times),
+                    }
+                    results.append(result)
+                    print(f"{case_name(result):<40} {result['best']:10.6f} s")
+    return results
+
+
+def environment():
+    return {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "tabulate": __version__,
+        "wcwidth": tabulate_module.wcwidth is not None,
+    }
+
+
+def compare(results, baseline):
+    """Print the time of every case relative to the same case in `baseline`."""
+    before = {case_name(result): result["best"] for result in baseline["results"]}
+    print()
+    print(f"{'case':<40} {'before':>10} {'after':>10} {'ratio':>7}")
+    ratios = []
+    for result in results:
+        name = case_name(result)
+        if name not in before or not before[name]:
+            continue
+        ratio = result["best"] / before[name]
+        ratios.append(ratio)
+        print(f"{name:<40} {before[name]:10.6f} {result['best']:10.6f} {ratio:7.2f}")
+    if ratios:
+        geomean = statistics.geometric_mean(ratios)
+        print(f"{len(ratios)} cases, geometric mean of after/before: {geomean:.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10, 100, 1000],
+        help="numbers of rows (default: 10 100 1000)",
+    )
+    parser.add_argument(
+        "--formats", nargs="+", default=tabulate_module.tabulate_formats,
+        choices=tabulate_module.tabulate_formats, metavar="FMT",
+        help="table formats (default: all of them)",
+    )
+    parser.add_argument(
+        "--kinds", nargs="+", default=list(KINDS), choices=list(KINDS),
+        help="kinds of data (default: all of them)",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON results of an earlier run")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    results = run(args.sizes, args.formats, args.kinds, args.repeat)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {"environment": environment(), "results": results}, f, indent=1
+            )
+    if baseline is not None:
+        compare(results, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Time tabulate rendering the reports of many stores in a pool of threads.
+
+Every store's report is a table of its stock, rendered with settings of
+its own in a `local_settings` block (some stores keep the whitespace of
+their cells, some have no padding in headers). The same reports are
+rendered by pools of different numbers of threads, and every rendered
+table is checked against the one rendered by a single thread. With the
+GIL, the threads take turns, so more of them shouldn't make rendering
+faster; on a free-threaded build of CPython they run at the same time.
+The results can be written to a JSON file and compared with those of an
+earlier run.
+
+Usage:
+
+    python inventory/tabulate/benchmarks/threads.py --output before.json
+    ... change tabulate ...
+    python inventory/tabulate/benchmarks/threads.py --output after.json \\
+        --compare before.json
+
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# make the vendored package importable when run as a script
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from tabulate import tabulate as tabulate_module  # noqa: E402
+from tabulate.version import __version__  # noqa: E402
+
+COUNTRIES = ["South Africa", "China", "Vietnam", "United States", "Pakistan"]
+SETTINGS = [
+    {},
+    {"preserve_whitespace": True},
+    {"min_padding": 0},
+    {"wide_chars_mode": False},
+]
+
+
+def make_reports(nstores, nrows):
+    """The headers, rows and settings of the report of every store."""
+    headers = ["Country", "Code", "Product", "Cost", "Quantity"]
+    reports = []
+    for store in range(nstores):
+        rng = random.Random(store)
+        rows = [
+            [
+                rng.choice(COUNTRIES),
+                "SKU%05d" % rng.randint(0, 99999),
+                " Product %d " % rng.randint(0, 999),
+                round(rng.uniform(100, 5000), 2),
+                rng.randint(0, 100),
+            ]
+            for _ in range(nrows)
+        ]
+        reports.append((headers, rows, SETTINGS[store % len(SETTINGS)]))
+    return reports
+
+
+def render(report, tablefmt):
+    headers, rows, settings = report
+    with tabulate_module.local_settings(**settings):
+        return tabulate_module.tabulate(rows, headers, tablefmt)
+
+
+def run(reports, tablefmt, workers, repeat):
+    expected = [render(report, tablefmt) for report in reports]
+    results = []
+    for nthreads in workers:
+        times = []
+        with ThreadPoolExecutor(max_workers=nthreads) as pool:
+            for _ in range(repeat):
+                started = time.perf_counter()
+                tables = list(
+                    pool.map(lambda report: render(report, tablefmt), reports)
+                )
+                times.append(time.perf_counter() - started)
+                if tables != expected:
+                    raise AssertionError(
+                        f"{nthreads} threads rendered other tables than one"
+                    )
+        result = {
+            "threads": nthreads,
+            "best": min(times),
+            "tables_per_second": len(reports) / min(times),
+        }
+        results.append(result)
+    for result in results:
+        result["speedup"] = results[0]["best"] / result["best"]
+        print(
+            f"{result['threads']:3d} threads {result['best']:10.6f} s "
+            f"{result['tables_per_second']:10.1f} tables/s "
+            f"{result['speedup']:6.2f}x"
+        )
+    return results
+
+
+def environment():
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "gil": is_gil_enabled() if is_gil_enabled is not None else True,
+        "tabulate": __version__,
+    }
+
+
+def compare(results, baseline):
+    """Print the time of every pool relative to the same pool in `baseline`."""
+    before = {result["threads"]: result["best"] for result in baseline["results"]}
+    print()
+    print(f"{'threads':>7} {'before':>10} {'after':>10} {'ratio':>7}")
+    for result in results:
+        nthreads = result["threads"]
+        if nthreads not in before or not before[nthreads]:
+            continue
+        ratio = result["best"] / before[nthreads]
+        print(
+            f"{nthreads:7d} {before[nthreads]:10.6f} "
+            f"{result['best']:10.6f} {ratio:7.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stores", type=int, default=32)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=[1, 2, 4, 8],
+        help="numbers of threads (default: 1 2 4 8)",
+    )
+    parser.add_argument(
+        "--format", default="grid", choices=tabulate_module.tabulate_formats,
+        metavar="FMT", help="table format (default: grid)",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON results of an earlier run")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    env = environment()
+    print(f"{env['cpus']} CPUs, GIL {'enabled' if env['gil'] else 'disabled'}")
+    reports = make_reports(args.stores, args.rows)
+    results = run(reports, args.format, args.workers, args.repeat)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"environment": env, "results": results}, f, indent=1)
+    if baseline is not None:
+        compare(results, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,86 @@
 """Pretty-print tabular data."""
 
-from collections import namedtuple
-from collections.abc import Iterable, Sized
-from html import escape as htmlescape
-from itertools import chain, zip_longest as izip_longest
-from functools import reduce, partial
+from collections import OrderedDict, deque, namedtuple
+from collections.abc import Iterable, MutableMapping, Sized
+from itertools import chain, islice, repeat, zip_longest as izip_longest
+from functools import lru_cache, partial, wraps
+import contextvars
 import io
+import os
 import re
 import math
+import sys
 import textwrap
-import dataclasses
+import threading
+import time
+
+# The modules used only by some formats and options (html, pickle, hashlib,
+# concurrent.futures, tracemalloc, ...) are imported where they are needed,
+# and the optional wcwidth module by _wcwidth, so that a short-lived script
+# doesn't pay for importing them.
+
+
+def _is_installed(name):
+    "Whether the top-level module `name` can be imported, without importing it."
+    if name in sys.modules:
+        return sys.modules[name] is not None
+    for finder in sys.meta_path:
+        try:
+            if finder.find_spec(name, None) is not None:
+                return True
+        except (AttributeError, ImportError):
+            pass
+    return False
+
+
+_wcwidth_module = False  # not imported yet
 
-try:
-    import wcwidth  # optional wide-character (CJK) support
-except ImportError:
-    wcwidth = None
+
+def _wcwidth():
+    "The wcwidth module for wide-character (CJK) support, or None."
+    global _wcwidth_module
+    if _wcwidth_module is False:
+        try:
+            import wcwidth
+        except ImportError:
+            wcwidth = None
+        _wcwidth_module = wcwidth
+    return _wcwidth_module
+
+
+def _wcswidth(s):
+    "The width of `s` in a terminal by wcwidth, or its length without it."
+    wcwidth = _wcwidth()
+    return len(s) if wcwidth is None else wcwidth.wcswidth(s)
+
+
+def __getattr__(name):
+    # the optional wcwidth module used to be imported with this one
+    if name == "wcwidth":
+        return _wcwidth()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def _is_file(f):
     return isinstance(f, io.IOBase)
 
 
-__all__ = ["tabulate", "tabulate_formats", "simple_separated_format"]
+__all__ = [
+    "tabulate",
+    "tabulate_iter",
+    "tabulate_columns",
+    "Tabulator",
+    "tabulate_live",
+    "PagedTable",
+    "IncrementalTable",
+    "width_cache_info",
+    "render_cache_info",
+    "render_cache_clear",
+    "local_settings",
+    "current_settings",
+    "tabulate_formats",
+    "simple_separated_format",
+]
 try:
     from .version import version as __version__  # noqa: F401
 except ImportError:
@@ -34,6 +93,20 @@ MIN_PADDING = 2
 # Whether or not to preserve leading/trailing whitespace in data.
 PRESERVE_WHITESPACE = False
 
+# Tables of at least this many cells are formatted in a pool of processes,
+# a column per process (None: never). Where new processes are spawned
+# rather than forked, the main module has to be safely importable (see the
+# multiprocessing docs).
+PARALLEL_MIN_CELLS = None
+
+# The number of processes formatting a big table (None: one per CPU).
+PARALLEL_WORKERS = None
+
+# The number of tables rendered last which `tabulate` remembers, to return
+# them again for the same data and options (0: none are remembered). See
+# `render_cache_info`.
+RENDER_CACHE_SIZE = 0
+
 _DEFAULT_FLOATFMT = "g"
 _DEFAULT_INTFMT = ""
 _DEFAULT_MISSINGVAL = ""
@@ -43,7 +116,16 @@ _DEFAULT_ALIGN = "default"
 
 
 # if True, enable wide-character (CJK) support
-WIDE_CHARS_MODE = wcwidth is not None
+WIDE_CHARS_MODE = _is_installed("wcwidth")
+
+# The settings above, as made for the current thread or asyncio task only by
+# `local_settings`; see `current_settings`.
+RenderSettings = namedtuple(
+    "RenderSettings", ["min_padding", "preserve_whitespace", "wide_chars_mode"]
+)
+
+# the settings made by the `local_settings` blocks being run, innermost last
+_local_settings = contextvars.ContextVar("tabulate_local_settings", default=())
 
 # Constant that can be used as part of passed rows to generate a separating line
 # It is purposely an unprintable character, very unlikely to be used in a table
@@ -101,6 +183,78 @@ TableFormat = namedtuple(
 )
 
 
+# The result of formatting and aligning tabular data, ready to be rendered
+# by _format_table or _iter_format_table, which take the first seven fields.
+# `rows` is an iterable of tuples of aligned cell values (and SEPARATING_LINE
+# markers), `colwidths` are the widths of the columns without padding.
+# `coltypes` and `maxdecimals` (the most symbols after the decimal point of
+# "decimal" aligned columns, None for the others) are what it takes to add
+# rows to the table later.
+_TableLayout = namedtuple(
+    "_TableLayout",
+    [
+        "fmt",
+        "headers",
+        "rows",
+        "colwidths",
+        "colaligns",
+        "is_multiline",
+        "rowaligns",
+        "coltypes",
+        "maxdecimals",
+    ],
+)
+
+
+# Columns of fixed widths in which rows can be rendered one by one, see
+# _iter_fixed_width_table. `columns` holds a tuple for every column: its
+# type (None if it's the type of every single value), numparse, floatfmt,
+# intfmt, missingval, alignment (None if it depends on the type of every
+# value), width and the maxdecimals of a "decimal" alignment. `colaligns`
+# are the alignments for the horizontal lines. `multiline_ok` is whether
+# the format has multiline rows at all. `settings` are the RenderSettings
+# the columns were laid out with, which their rows are rendered with too.
+_FixedWidthColumns = namedtuple(
+    "_FixedWidthColumns",
+    [
+        "fmt",
+        "headers",
+        "colwidths",
+        "colaligns",
+        "columns",
+        "is_multiline",
+        "multiline_ok",
+        "numalign",
+        "stralign",
+        "escape_first",
+        "settings",
+    ],
+)
+
+
+# Everything needed to render a table apart from its cells: the padded
+# column widths, the functions which pad and render rows, the row formats
+# (compiled for the table, see _compile_row) and the horizontal lines (None
+# for a line which is not drawn). It depends only on the table
+# format, the column widths and alignments, so it can be reused between
+# tables which look alike.
+_FormatPlan = namedtuple(
+    "_FormatPlan",
+    [
+        "padded_widths",
+        "pad_row",
+        "append_row",
+        "headerrow",
+        "datarow",
+        "lineabove",
+        "linebelowheader",
+        "linebetweenrows",
+        "linebelow",
+        "separating_line",
+    ],
+)
+
+
 def _is_separating_line(row):
     row_type = type(row)
     is_sl = (row_type == list or row_type == str) and (
@@ -175,6 +329,8 @@ def _html_row_with_attrs(celltag, unsafe, cell_values, colwidths, colaligns):
             for c, a in zip(cell_values, colaligns)
         ]
     else:
+        from html import escape as htmlescape
+
         values_with_attrs = [
             "<{0}{1}>{2}</{0}>".format(celltag,
                                        alignment.get(a, ""), htmlescape(c))
@@ -291,7 +447,136 @@ def _latex_row(cell_values, colwidths, colaligns, escrules=LATEX_ESCAPE_RULES):
     return _build_simple_row(escaped_values, rowfmt)
 
 
-def _rst_escape_first_column(rows, headers):
+def _escape_cells(cell_values, escape):
+    """Escape all the cells of a row by one call of `escape`.
+
+    The cells are joined by tabs, which `escape` must leave alone.
+
+    >>> from html import escape
+    >>> _escape_cells(["a&b", " <c> "], escape)
+    ['a&amp;b', ' &lt;c&gt; ']
+
+    """
+    joined = "\t".join(cell_values)
+    if joined.count("\t") == len(cell_values) - 1:
+        escaped = escape(joined).split("\t")
+        if len(escaped) == len(cell_values):
+            return escaped
+    return [escape(cell) for cell in cell_values]  # tabs within the cells
+
+
+def _compile_row(rowfmt, colaligns):
+    """Return a row format which renders rows like `rowfmt` does.
+
+    The row functions of the HTML, LaTeX, MediaWiki and Textile formats
+    are compiled into a template for the given column alignments, with all
+    the cells of a row escaped at once; other row formats are returned as
+    they are. A compiled row format falls back on `rowfmt` for
+    a row of another number of cells.
+
+    >>> row = _compile_row(_table_formats["latex"].datarow, ["left", "right"])
+    >>> row([" 50% ", " $1 "], [5, 4], ["left", "right"])
+    ' 50\\\\% & \\\\$1 \\\\\\\\'
+
+    """
+    func, args, keywords = rowfmt, (), {}
+    if isinstance(rowfmt, partial):
+        func, args, keywords = rowfmt.func, rowfmt.args, rowfmt.keywords
+    compiler = _row_compilers.get(func)
+    if compiler is None or not colaligns:
+        return rowfmt
+    render = compiler(*args, colaligns=colaligns, **keywords)
+    ncols = len(colaligns)
+
+    def compiled_row(cell_values, colwidths, colaligns):
+        if len(cell_values) != ncols:
+            return rowfmt(cell_values, colwidths, colaligns)
+        return render(cell_values)
+
+    return compiled_row
+
+
+def _template(parts):
+    "A str.format template of constant parts and a field between every two."
+    return "{}".join(part.replace("{", "{{").replace("}", "}}") for part in parts)
+
+
+def _compile_mediawiki_row(separator, colaligns):
+    alignment = {
+        "left": "",
+        "right": 'align="right"| ',
+        "center": 'align="center"| ',
+        "decimal": 'align="right"| ',
+    }
+    colsep = separator * 2
+    template = _template(
+        [separator + " " + alignment.get(colaligns[0], "")]
+        + [" " + colsep + " " + alignment.get(a, "") for a in colaligns[1:]]
+        + [" "]
+    )
+    return lambda cell_values: template.format(*cell_values).rstrip()
+
+
+def _compile_textile_row(colaligns):
+    alignment = {"left": "<.", "right": ">.", "center": "=.", "decimal": ">."}
+    parts = ["|" + alignment.get(a, "") for a in colaligns] + ["|"]
+    parts[1] = " " + parts[1]  # the first cell is followed by a space
+    template = _template(parts)
+    return lambda cell_values: template.format(*cell_values)
+
+
+def _compile_html_row(celltag, unsafe, colaligns):
+    alignment = {
+        "left": "",
+        "right": ' style="text-align: right;"',
+        "center": ' style="text-align: center;"',
+        "decimal": ' style="text-align: right;"',
+    }
+    begin, end = "<tr>", "</tr>"
+    if celltag == "th":  # it's a header row, create a new table header
+        begin, end = "<table>\n<thead>\n<tr>", "</tr>\n</thead>\n<tbody>"
+    template = _template(
+        [begin + "<{}{}>".format(celltag, alignment.get(colaligns[0], ""))]
+        + [
+            "</{0}><{0}{1}>".format(celltag, alignment.get(a, ""))
+            for a in colaligns[1:]
+        ]
+        + ["</{}>".format(celltag) + end]
+    )
+    if unsafe:
+        return lambda cell_values: template.format(*cell_values)
+    else:
+        from html import escape as htmlescape
+
+        return lambda cell_values: template.format(
+            *_escape_cells(cell_values, htmlescape)
+        )
+
+
+def _compile_latex_row(colaligns, escrules=LATEX_ESCAPE_RULES):
+    template = _template([""] + ["&"] * (len(colaligns) - 1) + ["\\\\"])
+    chars = "".join(re.escape(c) for c in escrules if len(c) == 1)
+    if not chars:
+        return lambda cell_values: template.format(*cell_values)
+    special = re.compile("[%s]" % chars)
+
+    def escape(text):
+        return special.sub(lambda m: escrules[m.group()], text)
+
+    if "\t" in escrules or any("\t" in v for v in escrules.values()):
+        return lambda cell_values: template.format(*map(escape, cell_values))
+    return lambda cell_values: template.format(*_escape_cells(cell_values, escape))
+
+
+_row_compilers = {
+    _mediawiki_row_with_attrs: _compile_mediawiki_row,
+    _textile_row_with_attrs: _compile_textile_row,
+    _html_row_with_attrs: _compile_html_row,
+    _latex_row: _compile_latex_row,
+}
+
+
+def _rst_escape_first_column(cols, headers):
     def escape_empty(val):
         if isinstance(val, (str, bytes)) and not val.strip():
             return ".."
@@ -299,384 +584,429 @@ def _rst_escape_first_column(rows, headers):
             return val
 
     new_headers = list(headers)
-    new_rows = []
+    new_cols = list(cols)
     if headers:
         new_headers[0] = escape_empty(headers[0])
-    for row in rows:
-        new_row = list(row)
-        if new_row:
-            new_row[0] = escape_empty(row[0])
-        new_rows.append(new_row)
-    return new_rows, new_headers
-
-
-_table_formats = {
-    "simple": TableFormat(
-        lineabove=Line("", "-", "  ", ""),
-        linebelowheader=Line("", "-", "  ", ""),
-        linebetweenrows=None,
-        linebelow=Line("", "-", "  ", ""),
-        headerrow=DataRow("", "  ", ""),
-        datarow=DataRow("", "  ", ""),
-        padding=0,
-        with_header_hide=["lineabove", "linebelow"],
-    ),
-    "plain": TableFormat(
-        lineabove=None,
-        linebelowheader=None,
-        linebetweenrows=None,
-        linebelow=None,
-        headerrow=DataRow("", "  ", ""),
-        datarow=DataRow("", "  ", ""),
-        padding=0,
-        with_header_hide=None,
-    ),
-    "grid": TableFormat(
-        lineabove=Line("+", "-", "+", "+"),
-        linebelowheader=Line("+", "=", "+", "+"),
-        linebetweenrows=Line("+", "-", "+", "+"),
-        linebelow=Line("+", "-", "+", "+"),
-        headerrow=DataRow("|", "|", "|"),
-        datarow=DataRow("|", "|", "|"),
-        padding=1,
-        with_header_hide=None,
-    ),
-    "simple_grid": TableFormat(
-        lineabove=Line("┌", "─", "┬", "┐"),
-        linebelowheader=Line("├", "─", "┼", "┤"),
-        linebetweenrows=Line("├", "─", "┼", "┤"),
-        linebelow=Line("└", "─", "┴", "┘"),
-        headerrow=DataRow("│", "│", "│"),
-        datarow=DataRow("│", "│", "│"),
-        padding=1,
-        with_header_hide=None,
-    ),
-    "rounded_grid": TableFormat(
-        lineabove=Line("╭", "─", "┬", "╮"),
-        linebelowheader=Line("├", "─", "┼", "┤"),
-        linebetweenrows=Line("├", "─", "┼", "┤"),
-        linebelow=Line("╰", "─", "┴", "╯"),
-        headerrow=DataRow("│", "│", "│"),
-        datarow=DataRow("│", "│", "│"),
-        padding=1,
-        with_header_hide=None,
-    ),
-    "heavy_grid": TableFormat(
-        lineabove=Line("┏", "━", "┳", "┓"),
-        linebelowheader=Line("┣", "━", "╋", "┫"),
-        linebetweenrows=Line("┣", "━", "╋", "┫"),
-        linebelow=Line("┗", "━", "┻", "┛"),
-        headerrow=DataRow("┃", "┃", "┃"),
-        datarow=DataRow("┃", "┃", "┃"),
-        padding=1,
-        with_header_hide=None,
-    ),
-    "mixed_grid": TableFormat(
-        lineabove=Line("┍", "━", "┯", "┑"),
-        linebelowheader=Line("┝", "━", "┿", "┥"),
-        linebetweenrows=Line("├", "─", "┼", "┤"),
-        linebelow=Line("┕", "━", "┷", "┙"),
-        headerrow=DataRow("│", "│", "│"),
-        datarow=DataRow("│", "│", "│"),
-        padding=1,
-        with_header_hide=None,
-    ),
-    "double_grid": TableFormat(
-        lineabove=Line("╔", "═", "╦", "╗"),
-        linebelowheader=Line("╠", "═", "╬", "╣"),
-        linebetweenrows=Line("╠", "═", "╬", "╣"),
-        linebelow=Line("╚", "═", "╩", "╝"),
-        headerrow=DataRow("║", "║", "║"),
-        datarow=DataRow("║", "║", "║"),
-        padding=1,
-        with_header_hide=None,
-    ),
-    "fancy_grid": TableFormat(
-        lineabove=Line("╒", "═", "╤", "╕"),
-        linebelowheader=Line("╞", "═", "╪", "╡"),
-        linebetweenrows=Line("├", "─", "┼", "┤"),
-        linebelow=Line("╘", "═", "╧", "╛"),
-        headerrow=DataRow("│", "│", "│"),
-        datarow=DataRow("│", "│", "│"),
-        padding=1,
-        with_header_hide=None,
-    ),
-    "outline": TableFormat(
-        lineabove=Line("+", "-", "+", "+"),
-        linebelowheader=Line("+", "=", "+", "+"),
-        linebetweenrows=None,
-        linebelow=Line("+", "-", "+", "+"),
-        headerrow=DataRow("|", "|", "|"),
-        datarow=DataRow("|", "|", "|"),
-        padding=1,
-        with_header_hide=None,
-    ),
-    "simple_outline": TableFormat(
-        lineabove=Line("┌", "─", "┬", "┐"),
-        linebelowheader=Line("├", "─", "┼", "┤"),
-        linebetweenrows=None,
-        linebelow=Line("└", "─", "┴", "┘"),
-        headerrow=DataRow("│", "│", "│"),
-        datarow=DataRow("│", "│", "│"),
-        padding=1,
-        with_header_hide=None,
-    ),
-    "rounded_outline": TableFormat(
-        lineabove=Line("╭", "─", "┬", "╮"),
-        linebelowheader=Line("├", "─", "┼", "┤"),
-        linebetweenrows=None,
-        linebelow=Line("╰", "─", "┴", "╯"),
-        headerrow=DataRow("│", "│", "│"),
-        datarow=DataRow("│", "│", "│"),
-        padding=1,
-        with_header_hide=None,
-    ),
-    "heavy_outline": TableFormat(
-        lineabove=Line("┏", "━", "┳", "┓"),
-        linebelowheader=Line("┣", "━", "╋", "┫"),
-        linebetweenrows=None,
-        linebelow=Line("┗", "━", "┻", "┛"),
-        headerrow=DataRow("┃", "┃", "┃"),
-        datarow=DataRow("┃", "┃", "┃"),
-        padding=1,
-        with_header_hide=None,
-    ),
-    "mixed_outline": TableFormat(
-        lineabove=Line("┍", "━", "┯", "┑"),
-        linebelowheader=Line("┝", "━", "┿", "┥"),
-        linebetweenrows=None,
-        linebelow=Line("┕", "━", "┷", "┙"),
-        headerrow=DataRow("│", "│", "│"),
-        datarow=DataRow("│", "│", "│"),
-        padding=1,
-        with_header_hide=None,
-    ),
-    "double_outline": TableFormat(
-        lineabove=Line("╔", "═", "╦", "╗"),
-        linebelowheader=Line("╠", "═", "╬", "╣"),
-        linebetweenrows=None,
-        linebelow=Line("╚", "═", "╩", "╝"),
-        headerrow=DataRow("║", "║", "║"),
-        datarow=DataRow("║", "║", "║"),
-        padding=1,
-        with_header_hide=None,
-    ),
-    "fancy_outline": TableFormat(
-        lineabove=Line("╒", "═", "╤", "╕"),
-        linebelowheader=Line("╞", "═", "╪", "╡"),
-        linebetweenrows=None,
-        linebelow=Line("╘", "═", "╧", "╛"),
-        headerrow=DataRow("│", "│", "│"),
-        datarow=DataRow("│", "│", "│"),
-        padding=1,
-        with_header_hide=None,
-    ),
-    "github": TableFormat(
-        lineabove=Line("|", "-", "|", "|"),
-        linebelowheader=Line("|", "-", "|", "|"),
-        linebetweenrows=None,
-        linebelow=None,
-        headerrow=DataRow("|", "|", "|"),
-        datarow=DataRow("|", "|", "|"),
-        padding=1,
-        with_header_hide=["lineabove"],
-    ),
-    "pipe": TableFormat(
-        lineabove=_pipe_line_with_colons,
-        linebelowheader=_pipe_line_with_colons,
-        linebetweenrows=None,
-        linebelow=None,
-        headerrow=DataRow("|", "|", "|"),
-        datarow=DataRow("|", "|", "|"),
-        padding=1,
-        with_header_hide=["lineabove"],
-    ),
-    "orgtbl": TableFormat(
-        lineabove=None,
-        linebelowheader=Line("|", "-", "+", "|"),
-        linebetweenrows=None,
-        linebelow=None,
-        headerrow=DataRow("|", "|", "|"),
-        datarow=DataRow("|", "|", "|"),
-        padding=1,
-        with_header_hide=None,
-    ),
-    "jira": TableFormat(
-        lineabove=None,
-        linebelowheader=None,
-        linebetweenrows=None,
-        linebelow=None,
-        headerrow=DataRow("||", "||", "||"),
-        datarow=DataRow("|", "|", "|"),
-        padding=1,
-        with_header_hide=None,
-    ),
-    "presto": TableFormat(
-        lineabove=None,
-        linebelowheader=Line("", "-", "+", ""),
-        linebetweenrows=None,
-        linebelow=None,
-        headerrow=DataRow("", "|", ""),
-        datarow=DataRow("", "|", ""),
-        padding=1,
-        with_header_hide=None,
-    ),
-    "pretty": TableFormat(
-        lineabove=Line("+", "-", "+", "+"),
-        linebelowheader=Line("+", "-", "+", "+"),
-        linebetweenrows=None,
-        linebelow=Line("+", "-", "+", "+"),
-        headerrow=DataRow("|", "|", "|"),
-        datarow=DataRow("|", "|", "|"),
-        padding=1,
-        with_header_hide=None,
-    ),
-    "psql": TableFormat(
-        lineabove=Line("+", "-", "+", "+"),
-        linebelowheader=Line("|", "-", "+", "|"),
-        linebetweenrows=None,
-        linebelow=Line("+", "-", "+", "+"),
-        headerrow=DataRow("|", "|", "|"),
-        datarow=DataRow("|", "|", "|"),
-        padding=1,
-        with_header_hide=None,
-    ),
-    "rst": TableFormat(
-        lineabove=Line("", "=", "  ", ""),
-        linebelowheader=Line("", "=", "  ", ""),
-        linebetweenrows=None,
-        linebelow=Line("", "=", "  ", ""),
-        headerrow=DataRow("", "  ", ""),
-        datarow=DataRow("", "  ", ""),
-        padding=0,
-        with_header_hide=None,
-    ),
-    "mediawiki": TableFormat(
-        lineabove=Line(
-            '{| class="wikitable" style="text-align: left;"',
-            "",
-            "",
-            "\n|+ <!-- caption -->\n|-",
+    if new_cols and not _is_numeric_array(new_cols[0]):
+        new_cols[0] = [escape_empty(val) for val in new_cols[0]]
+    return new_cols, new_headers
+
+
+class _TableFormats(MutableMapping):
+    """The table formats by name, a mapping of names to TableFormats.
+
+    A format is given as a function of no arguments which builds its
+    TableFormat the first time it is looked up, so importing this module
+    doesn't build all of them. Every way of reading the mapping (values,
+    items, copy, dict(...)) looks the formats up, so it only ever holds
+    TableFormats; they can be added and removed as in any dict.
+
+    >>> formats = _TableFormats({"plain": lambda: _table_formats["plain"]})
+    >>> dict(formats) == formats.copy() == {"plain": _table_formats["plain"]}
+    True
+
+    """
+
+    def __init__(self, builders=()):
+        self._formats = dict(builders)
+
+    def __getitem__(self, name):
+        fmt = self._formats[name]
+        if not isinstance(fmt, TableFormat):
+            fmt = self._formats[name] = fmt()
+        return fmt
+
+    def __setitem__(self, name, fmt):
+        self._formats[name] = fmt
+
+    def __delitem__(self, name):
+        del self._formats[name]
+
+    def __iter__(self):
+        return iter(self._formats)
+
+    def __len__(self):
+        return len(self._formats)
+
+    def __contains__(self, name):
+        return name in self._formats
+
+    def copy(self):
+        return dict(self.items())
+
+    def __repr__(self):
+        return repr(self.copy())
+
+
+_table_formats = _TableFormats(
+    {
+        "simple": lambda: TableFormat(
+            lineabove=Line("", "-", "  ", ""),
+            linebelowheader=Line("", "-", "  ", ""),
+            linebetweenrows=None,
+            linebelow=Line("", "-", "  ", ""),
+            headerrow=DataRow("", "  ", ""),
+            datarow=DataRow("", "  ", ""),
+            padding=0,
+            with_header_hide=["lineabove", "linebelow"],
         ),
-        linebelowheader=Line("|-", "", "", ""),
-        linebetweenrows=Line("|-", "", "", ""),
-        linebelow=Line("|}", "", "", ""),
-        headerrow=partial(_mediawiki_row_with_attrs, "!"),
-        datarow=partial(_mediawiki_row_with_attrs, "|"),
-        padding=0,
-        with_header_hide=None,
-    ),
-    "moinmoin": TableFormat(
-        lineabove=None,
-        linebelowheader=None,
-        linebetweenrows=None,
-        linebelow=None,
-        headerrow=partial(_moin_row_with_attrs, "||", header="'''"),
-        datarow=partial(_moin_row_with_attrs, "||"),
-        padding=1,
-        with_header_hide=None,
-    ),
-    "youtrack": TableFormat(
-        lineabove=None,
-        linebelowheader=None,
-        linebetweenrows=None,
-        linebelow=None,
-        headerrow=DataRow("|| ", " || ", " || "),
-        datarow=DataRow("| ", " | ", " |"),
-        padding=1,
-        with_header_hide=None,
-    ),
-    "html": TableFormat(
-        lineabove=_html_begin_table_without_header,
-        linebelowheader="",
-        linebetweenrows=None,
-        linebelow=Line("</tbody>\n</table>", "", "", ""),
-        headerrow=partial(_html_row_with_attrs, "th", False),
-        datarow=partial(_html_row_with_attrs, "td", False),
-        padding=0,
-        with_header_hide=["lineabove"],
-    ),
-    "unsafehtml": TableFormat(
-        lineabove=_html_begin_table_without_header,
-        linebelowheader="",
-        linebetweenrows=None,
-        linebelow=Line("</tbody>\n</table>", "", "", ""),
-        headerrow=partial(_html_row_with_attrs, "th", True),
-        datarow=partial(_html_row_with_attrs, "td", True),
-        padding=0,
-        with_header_hide=["lineabove"],
-    ),
-    "latex": TableFormat(
-        lineabove=_latex_line_begin_tabular,
-        linebelowheader=Line("\\hline", "", "", ""),
-        linebetweenrows=None,
-        linebelow=Line("\\hline\n\\end{tabular}", "", "", ""),
-        headerrow=_latex_row,
-        datarow=_latex_row,
-        padding=1,
-        with_header_hide=None,
-    ),
-    "latex_raw": TableFormat(
-        lineabove=_latex_line_begin_tabular,
-        linebelowheader=Line("\\hline", "", "", ""),
-        linebetweenrows=None,
-        linebelow=Line("\\hline\n\\end{tabular}", "", "", ""),
-        headerrow=partial(_latex_row, escrules={}),
-        datarow=partial(_latex_row, escrules={}),
-        padding=1,
-        with_header_hide=None,
-    ),
-    "latex_booktabs": TableFormat(
-        lineabove=partial(_latex_line_begin_tabular, booktabs=True),
-        linebelowheader=Line("\\midrule", "", "", ""),
-        linebetweenrows=None,
-        linebelow=Line("\\bottomrule\n\\end{tabular}", "", "", ""),
-        headerrow=_latex_row,
-        datarow=_latex_row,
-        padding=1,
-        with_header_hide=None,
-    ),
-    "latex_longtable": TableFormat(
-        lineabove=partial(_latex_line_begin_tabular, longtable=True),
-        linebelowheader=Line("\\hline\n\\endhead", "", "", ""),
-        linebetweenrows=None,
-        linebelow=Line("\\hline\n\\end{longtable}", "", "", ""),
-        headerrow=_latex_row,
-        datarow=_latex_row,
-        padding=1,
-        with_header_hide=None,
-    ),
-    "tsv": TableFormat(
-        lineabove=None,
-        linebelowheader=None,
-        linebetweenrows=None,
-        linebelow=None,
-        headerrow=DataRow("", "\t", ""),
-        datarow=DataRow("", "\t", ""),
-        padding=0,
-        with_header_hide=None,
-    ),
-    "textile": TableFormat(
-        lineabove=None,
-        linebelowheader=None,
-        linebetweenrows=None,
-        linebelow=None,
-        headerrow=DataRow("|_. ", "|_.", "|"),
-        datarow=_textile_row_with_attrs,
-        padding=1,
-        with_header_hide=None,
-    ),
-    "asciidoc": TableFormat(
-        lineabove=partial(_asciidoc_row, False),
-        linebelowheader=None,
-        linebetweenrows=None,
-        linebelow=Line("|====", "", "", ""),
-        headerrow=partial(_asciidoc_row, True),
-        datarow=partial(_asciidoc_row, False),
-        padding=1,
-        with_header_hide=["lineabove"],
-    ),
-}
+        "plain": lambda: TableFormat(
+            lineabove=None,
+            linebelowheader=None,
+            linebetweenrows=None,
+            linebelow=None,
+            headerrow=DataRow("", "  ", ""),
+            datarow=DataRow("", "  ", ""),
+            padding=0,
+            with_header_hide=None,
+        ),
+        "grid": lambda: TableFormat(
+            lineabove=Line("+", "-", "+", "+"),
+            linebelowheader=Line("+", "=", "+", "+"),
+            linebetweenrows=Line("+", "-", "+", "+"),
+            linebelow=Line("+", "-", "+", "+"),
+            headerrow=DataRow("|", "|", "|"),
+            datarow=DataRow("|", "|", "|"),
+            padding=1,
+            with_header_hide=None,
+        ),
+        "simple_grid": lambda: TableFormat(
+            lineabove=Line("┌", "─", "┬", "┐"),
+            linebelowheader=Line("├", "─", "┼", "┤"),
+            linebetweenrows=Line("├", "─", "┼", "┤"),
+            linebelow=Line("└", "─", "┴", "┘"),
+            headerrow=DataRow("│", "│", "│"),
+            datarow=DataRow("│", "│", "│"),
+            padding=1,
+            with_header_hide=None,
+        ),
+        "rounded_grid": lambda: TableFormat(
+            lineabove=Line("╭", "─", "┬", "╮"),
+            linebelowheader=Line("├", "─", "┼", "┤"),
+            linebetweenrows=Line("├", "─", "┼", "┤"),
+            linebelow=Line("╰", "─", "┴", "╯"),
+            headerrow=DataRow("│", "│", "│"),
+            datarow=DataRow("│", "│", "│"),
+            padding=1,
+            with_header_hide=None,
+        ),
+        "heavy_grid": lambda: TableFormat(
+            lineabove=Line("┏", "━", "┳", "┓"),
+            linebelowheader=Line("┣", "━", "╋", "┫"),
+            linebetweenrows=Line("┣", "━", "╋", "┫"),
+            linebelow=Line("┗", "━", "┻", "┛"),
+            headerrow=DataRow("┃", "┃", "┃"),
+            datarow=DataRow("┃", "┃", "┃"),
+            padding=1,
+            with_header_hide=None,
+        ),
+        "mixed_grid": lambda: TableFormat(
+            lineabove=Line("┍", "━", "┯", "┑"),
+            linebelowheader=Line("┝", "━", "┿", "┥"),
+            linebetweenrows=Line("├", "─", "┼", "┤"),
+            linebelow=Line("┕", "━", "┷", "┙"),
+            headerrow=DataRow("│", "│", "│"),
+            datarow=DataRow("│", "│", "│"),
+            padding=1,
+            with_header_hide=None,
+        ),
+        "double_grid": lambda: TableFormat(
+            lineabove=Line("╔", "═", "╦", "╗"),
+            linebelowheader=Line("╠", "═", "╬", "╣"),
+            linebetweenrows=Line("╠", "═", "╬", "╣"),
+            linebelow=Line("╚", "═", "╩", "╝"),
+            headerrow=DataRow("║", "║", "║"),
+            datarow=DataRow("║", "║", "║"),
+            padding=1,
+            with_header_hide=None,
+        ),
+        "fancy_grid": lambda: TableFormat(
+            lineabove=Line("╒", "═", "╤", "╕"),
+            linebelowheader=Line("╞", "═", "╪", "╡"),
+            linebetweenrows=Line("├", "─", "┼", "┤"),
+            linebelow=Line("╘", "═", "╧", "╛"),
+            headerrow=DataRow("│", "│", "│"),
+            datarow=DataRow("│", "│", "│"),
+            padding=1,
+            with_header_hide=None,
+        ),
+        "outline": lambda: TableFormat(
+            lineabove=Line("+", "-", "+", "+"),
+            linebelowheader=Line("+", "=", "+", "+"),
+            linebetweenrows=None,
+            linebelow=Line("+", "-", "+", "+"),
+            headerrow=DataRow("|", "|", "|"),
+            datarow=DataRow("|", "|", "|"),
+            padding=1,
+            with_header_hide=None,
+        ),
+        "simple_outline": lambda: TableFormat(
+            lineabove=Line("┌", "─", "┬", "┐"),
+            linebelowheader=Line("├", "─", "┼", "┤"),
+            linebetweenrows=None,
+            linebelow=Line("└", "─", "┴", "┘"),
+            headerrow=DataRow("│", "│", "│"),
+            datarow=DataRow("│", "│", "│"),
+            padding=1,
+            with_header_hide=None,
+        ),
+        "rounded_outline": lambda: TableFormat(
+            lineabove=Line("╭", "─", "┬", "╮"),
+            linebelowheader=Line("├", "─", "┼", "┤"),
+            linebetweenrows=None,
+            linebelow=Line("╰", "─", "┴", "╯"),
+            headerrow=DataRow("│", "│", "│"),
+            datarow=DataRow("│", "│", "│"),
+            padding=1,
+            with_header_hide=None,
+        ),
+        "heavy_outline": lambda: TableFormat(
+            lineabove=Line("┏", "━", "┳", "┓"),
+            linebelowheader=Line("┣", "━", "╋", "┫"),
+            linebetweenrows=None,
+            linebelow=Line("┗", "━", "┻", "┛"),
+            headerrow=DataRow("┃", "┃", "┃"),
+            datarow=DataRow("┃", "┃", "┃"),
+            padding=1,
+            with_header_hide=None,
+        ),
+        "mixed_outline": lambda: TableFormat(
+            lineabove=Line("┍", "━", "┯", "┑"),
+            linebelowheader=Line("┝", "━", "┿", "┥"),
+            linebetweenrows=None,
+            linebelow=Line("┕", "━", "┷", "┙"),
+            headerrow=DataRow("│", "│", "│"),
+            datarow=DataRow("│", "│", "│"),
+            padding=1,
+            with_header_hide=None,
+        ),
+        "double_outline": lambda: TableFormat(
+            lineabove=Line("╔", "═", "╦", "╗"),
+            linebelowheader=Line("╠", "═", "╬", "╣"),
+            linebetweenrows=None,
+            linebelow=Line("╚", "═", "╩", "╝"),
+            headerrow=DataRow("║", "║", "║"),
+            datarow=DataRow("║", "║", "║"),
+            padding=1,
+            with_header_hide=None,
+        ),
+        "fancy_outline": lambda: TableFormat(
+            lineabove=Line("╒", "═", "╤", "╕"),
+            linebelowheader=Line("╞", "═", "╪", "╡"),
+            linebetweenrows=None,
+            linebelow=Line("╘", "═", "╧", "╛"),
+            headerrow=DataRow("│", "│", "│"),
+            datarow=DataRow("│", "│", "│"),
+            padding=1,
+            with_header_hide=None,
+        ),
+        "github": lambda: TableFormat(
+            lineabove=Line("|", "-", "|", "|"),
+            linebelowheader=Line("|", "-", "|", "|"),
+            linebetweenrows=None,
+            linebelow=None,
+            headerrow=DataRow("|", "|", "|"),
+            datarow=DataRow("|", "|", "|"),
+            padding=1,
+            with_header_hide=["lineabove"],
+        ),
+        "pipe": lambda: TableFormat(
+            lineabove=_pipe_line_with_colons,
+            linebelowheader=_pipe_line_with_colons,
+            linebetweenrows=None,
+            linebelow=None,
+            headerrow=DataRow("|", "|", "|"),
+            datarow=DataRow("|", "|", "|"),
+            padding=1,
+            with_header_hide=["lineabove"],
+        ),
+        "orgtbl": lambda: TableFormat(
+            lineabove=None,
+            linebelowheader=Line("|", "-", "+", "|"),
+            linebetweenrows=None,
+            linebelow=None,
+            headerrow=DataRow("|", "|", "|"),
+            datarow=DataRow("|", "|", "|"),
+            padding=1,
+            with_header_hide=None,
+        ),
+        "jira": lambda: TableFormat(
+            lineabove=None,
+            linebelowheader=None,
+            linebetweenrows=None,
+            linebelow=None,
+            headerrow=DataRow("||", "||", "||"),
+            datarow=DataRow("|", "|", "|"),
+            padding=1,
+            with_header_hide=None,
+        ),
+        "presto": lambda: TableFormat(
+            lineabove=None,
+            linebelowheader=Line("", "-", "+", ""),
+            linebetweenrows=None,
+            linebelow=None,
+            headerrow=DataRow("", "|", ""),
+            datarow=DataRow("", "|", ""),
+            padding=1,
+            with_header_hide=None,
+        ),
+        "pretty": lambda: TableFormat(
+            lineabove=Line("+", "-", "+", "+"),
+            linebelowheader=Line("+", "-", "+", "+"),
+            linebetweenrows=None,
+            linebelow=Line("+", "-", "+", "+"),
+            headerrow=DataRow("|", "|", "|"),
+            datarow=DataRow("|", "|", "|"),
+            padding=1,
+            with_header_hide=None,
+        ),
+        "psql": lambda: TableFormat(
+            lineabove=Line("+", "-", "+", "+"),
+            linebelowheader=Line("|", "-", "+", "|"),
+            linebetweenrows=None,
+            linebelow=Line("+", "-", "+", "+"),
+            headerrow=DataRow("|", "|", "|"),
+            datarow=DataRow("|", "|", "|"),
+            padding=1,
+            with_header_hide=None,
+        ),
+        "rst": lambda: TableFormat(
+            lineabove=Line("", "=", "  ", ""),
+            linebelowheader=Line("", "=", "  ", ""),
+            linebetweenrows=None,
+            linebelow=Line("", "=", "  ", ""),
+            headerrow=DataRow("", "  ", ""),
+            datarow=DataRow("", "  ", ""),
+            padding=0,
+            with_header_hide=None,
+        ),
+        "mediawiki": lambda: TableFormat(
+            lineabove=Line(
+                '{| class="wikitable" style="text-align: left;"',
+                "",
+                "",
+                "\n|+ <!-- caption -->\n|-",
+            ),
+            linebelowheader=Line("|-", "", "", ""),
+            linebetweenrows=Line("|-", "", "", ""),
+            linebelow=Line("|}", "", "", ""),
+            headerrow=partial(_mediawiki_row_with_attrs, "!"),
+            datarow=partial(_mediawiki_row_with_attrs, "|"),
+            padding=0,
+            with_header_hide=None,
+        ),
+        "moinmoin": lambda: TableFormat(
+            lineabove=None,
+            linebelowheader=None,
+            linebetweenrows=None,
+            linebelow=None,
+            headerrow=partial(_moin_row_with_attrs, "||", header="'''"),
+            datarow=partial(_moin_row_with_attrs, "||"),
+            padding=1,
+            with_header_hide=None,
+        ),
+        "youtrack": lambda: TableFormat(
+            lineabove=None,
+            linebelowheader=None,
+            linebetweenrows=None,
+            linebelow=None,
+            headerrow=DataRow("|| ", " || ", " || "),
+            datarow=DataRow("| ", " | ", " |"),
+            padding=1,
+            with_header_hide=None,
+        ),
+        "html": lambda: TableFormat(
+            lineabove=_html_begin_table_without_header,
+            linebelowheader="",
+            linebetweenrows=None,
+            linebelow=Line("</tbody>\n</table>", "", "", ""),
+            headerrow=partial(_html_row_with_attrs, "th", False),
+            datarow=partial(_html_row_with_attrs, "td", False),
+            padding=0,
+            with_header_hide=["lineabove"],
+        ),
+        "unsafehtml": lambda: TableFormat(
+            lineabove=_html_begin_table_without_header,
+            linebelowheader="",
+            linebetweenrows=None,
+            linebelow=Line("</tbody>\n</table>", "", "", ""),
+            headerrow=partial(_html_row_with_attrs, "th", True),
+            datarow=partial(_html_row_with_attrs, "td", True),
+            padding=0,
+            with_header_hide=["lineabove"],
+        ),
+        "latex": lambda: TableFormat(
+            lineabove=_latex_line_begin_tabular,
+            linebelowheader=Line("\\hline", "", "", ""),
+            linebetweenrows=None,
+            linebelow=Line("\\hline\n\\end{tabular}", "", "", ""),
+            headerrow=_latex_row,
+            datarow=_latex_row,
+            padding=1,
+            with_header_hide=None,
+        ),
+        "latex_raw": lambda: TableFormat(
+            lineabove=_latex_line_begin_tabular,
+            linebelowheader=Line("\\hline", "", "", ""),
+            linebetweenrows=None,
+            linebelow=Line("\\hline\n\\end{tabular}", "", "", ""),
+            headerrow=partial(_latex_row, escrules={}),
+            datarow=partial(_latex_row, escrules={}),
+            padding=1,
+            with_header_hide=None,
+        ),
+        "latex_booktabs": lambda: TableFormat(
+            lineabove=partial(_latex_line_begin_tabular, booktabs=True),
+            linebelowheader=Line("\\midrule", "", "", ""),
+            linebetweenrows=None,
+            linebelow=Line("\\bottomrule\n\\end{tabular}", "", "", ""),
+            headerrow=_latex_row,
+            datarow=_latex_row,
+            padding=1,
+            with_header_hide=None,
+        ),
+        "latex_longtable": lambda: TableFormat(
+            lineabove=partial(_latex_line_begin_tabular, longtable=True),
+            linebelowheader=Line("\\hline\n\\endhead", "", "", ""),
+            linebetweenrows=None,
+            linebelow=Line("\\hline\n\\end{longtable}", "", "", ""),
+            headerrow=_latex_row,
+            datarow=_latex_row,
+            padding=1,
+            with_header_hide=None,
+        ),
+        "tsv": lambda: TableFormat(
+            lineabove=None,
+            linebelowheader=None,
+            linebetweenrows=None,
+            linebelow=None,
+            headerrow=DataRow("", "\t", ""),
+            datarow=DataRow("", "\t", ""),
+            padding=0,
+            with_header_hide=None,
+        ),
+        "textile": lambda: TableFormat(
+            lineabove=None,
+            linebelowheader=None,
+            linebetweenrows=None,
+            linebelow=None,
+            headerrow=DataRow("|_. ", "|_.", "|"),
+            datarow=_textile_row_with_attrs,
+            padding=1,
+            with_header_hide=None,
+        ),
+        "asciidoc": lambda: TableFormat(
+            lineabove=partial(_asciidoc_row, False),
+            linebelowheader=None,
+            linebetweenrows=None,
+            linebelow=Line("|====", "", "", ""),
+            headerrow=partial(_asciidoc_row, True),
+            datarow=partial(_asciidoc_row, False),
+            padding=1,
+            with_header_hide=["lineabove"],
+        ),
+    }
+)
 
 
 tabulate_formats = list(sorted(_table_formats.keys()))
@@ -713,8 +1043,25 @@ multiline_formats = {
 #       - tsv: TBD
 #       - textile: Replace \n with <br/> (must be well-formed XML)
 
-_multiline_codes = re.compile(r"\r|\n|\r\n")
-_multiline_codes_bytes = re.compile(b"\r|\n|\r\n")
+class _LazyPattern:
+    """A regular expression which is compiled the first time it is used.
+
+    Its attributes are those of the compiled pattern, e.g.
+    _LazyPattern("a+").match("aa").group() is "aa"; each one is kept once
+    it's looked up, so using it costs no more than using the pattern.
+    """
+
+    def __init__(self, pattern, flags=0):
+        self._args = (pattern, flags)
+
+    def __getattr__(self, name):
+        value = getattr(re.compile(*self._args), name)
+        setattr(self, name, value)
+        return value
+
+
+_multiline_codes = _LazyPattern(r"\r|\n|\r\n")
+_multiline_codes_bytes = _LazyPattern(b"\r|\n|\r\n")
 
 # Handle ANSI escape sequences for both control sequence introducer (CSI) and
 # operating system command (OSC). Both of these begin with 0x1b (or octal 033),
@@ -762,11 +1109,11 @@ _ansi_escape_pat = rf"""
         {_osc}8;;{_st}  # "closing" OSC sequence
     )
 """
-_ansi_codes = re.compile(_ansi_escape_pat, re.VERBOSE)
-_ansi_codes_bytes = re.compile(_ansi_escape_pat.encode("utf8"), re.VERBOSE)
+_ansi_codes = _LazyPattern(_ansi_escape_pat, re.VERBOSE)
+_ansi_codes_bytes = _LazyPattern(_ansi_escape_pat.encode("utf8"), re.VERBOSE)
 _ansi_color_reset_code = "\033[0m"
 
-_float_with_thousands_separators = re.compile(
+_float_with_thousands_separators = _LazyPattern(
     r"^(([+-]?[0-9]{1,3})(?:,([0-9]{3}))*)?(?(1)\.[0-9]*|\.[0-9]+)?$"
 )
 
@@ -791,6 +1138,71 @@ def simple_separated_format(separator):
     )
 
 
+def current_settings():
+    """The RenderSettings which tables are rendered with in this thread.
+
+    They are those of the innermost `local_settings` block being run, or
+    else the module variables MIN_PADDING, PRESERVE_WHITESPACE and
+    WIDE_CHARS_MODE.
+
+    >>> current_settings().min_padding
+    2
+
+    """
+    stack = _local_settings.get()
+    if stack:
+        return stack[-1]
+    return RenderSettings(MIN_PADDING, PRESERVE_WHITESPACE, WIDE_CHARS_MODE)
+
+
+class _LocalSettingsBlock:
+    """The context manager returned by local_settings.
+
+    The settings are kept in a context variable, so the same block can be
+    entered by many threads at once, and nested.
+    """
+
+    def __init__(self, changes):
+        self.changes = changes
+
+    def __enter__(self):
+        settings = current_settings()._replace(**self.changes)
+        _local_settings.set(_local_settings.get() + (settings,))
+        return settings
+
+    def __exit__(self, *exc_info):
+        _local_settings.set(_local_settings.get()[:-1])
+
+
+def local_settings(min_padding=None, preserve_whitespace=None, wide_chars_mode=None):
+    """Change settings for the current thread (or asyncio task) only.
+
+    Returns a context manager: in a `with` block, the tables rendered by
+    this thread use the settings given here instead of the module variables
+    MIN_PADDING, PRESERVE_WHITESPACE and WIDE_CHARS_MODE (None keeps the
+    current one). Other threads can render tables with other settings at
+    the same time. New threads don't inherit the settings of the thread
+    which starts them; pass them `current_settings()` if they should.
+
+    >>> with local_settings(min_padding=0) as settings:
+    ...     print(settings.min_padding, current_settings().min_padding)
+    0 0
+    >>> current_settings().min_padding
+    2
+
+    """
+    changes = {
+        name: value
+        for name, value in (
+            ("min_padding", min_padding),
+            ("preserve_whitespace", preserve_whitespace),
+            ("wide_chars_mode", wide_chars_mode),
+        )
+        if value is not None
+    }
+    return _LocalSettingsBlock(changes)
+
+
 def _isnumber_with_thousands_separator(string):
     """
     >>> _isnumber_with_thousands_separator(".")
@@ -821,7 +1233,7 @@ def _isnumber_with_thousands_separator(string):
     except (UnicodeDecodeError, AttributeError):
         pass
 
-    return bool(re.match(_float_with_thousands_separators, string))
+    return bool(_float_with_thousands_separators.match(string))
 
 
 def _isconvertible(conv, string):
@@ -845,11 +1257,11 @@ def _isnumber(string):
     >>> _isnumber("inf")
     True
     """
-    if not _isconvertible(float, string):
+    try:
+        number = float(string)
+    except (ValueError, TypeError):
         return False
-    elif isinstance(string, (str, bytes)) and (
-        math.isinf(float(string)) or math.isnan(float(string))
-    ):
+    if isinstance(string, (str, bytes)) and (math.isinf(number) or math.isnan(number)):
         return string.lower() in ["inf", "-inf", "nan"]
     return True
 
@@ -897,24 +1309,66 @@ def _type(string, has_invisible=True, numparse=True):
     True
 
     """
+    return _parse_value(string, has_invisible, numparse)[0]
 
-    if has_invisible and isinstance(string, (str, bytes)):
-        string = _strip_ansi(string)
 
+def _parse_value(string, has_invisible=True, numparse=True):
+    """The least generic type of a value and its numeric value.
+
+    Every conversion is attempted at most once, and the parsed number is
+    kept so that it can be reused when the value is formatted. The number
+    is None if the value is not a number, or if it is a number wrapped in
+    invisible codes.
+
+    >>> _parse_value("12")
+    (<class 'int'>, 12)
+    >>> _parse_value("1e3")
+    (<class 'float'>, 1000.0)
+    >>> _parse_value('\x1b[31m1.5\x1b[0m')
+    (<class 'float'>, None)
+    >>> _parse_value("spam")
+    (<class 'str'>, None)
+
+    """
     if string is None:
-        return type(None)
-    elif hasattr(string, "isoformat"):  # datetime.datetime, date, and time
-        return str
-    elif _isbool(string):
-        return bool
-    elif _isint(string) and numparse:
-        return int
-    elif _isnumber(string) and numparse:
-        return float
-    elif isinstance(string, bytes):
-        return bytes
+        return type(None), None
+    is_text = isinstance(string, (str, bytes))
+    is_colored = (
+        has_invisible
+        and is_text
+        and (b"\x1b" if isinstance(string, bytes) else "\x1b") in string
+    )
+    if is_colored:
+        string = _strip_ansi(string)
+
+    if hasattr(string, "isoformat"):  # datetime.datetime, date, and time
+        return str, None
+    elif type(string) is bool or (is_text and string in ("True", "False")):
+        return bool, None
+    elif numparse:
+        if type(string) is int:
+            return int, string
+        if is_text:
+            try:
+                number = int(string)
+                return int, None if is_colored else number
+            except (ValueError, TypeError):
+                pass
+        try:
+            number = float(string)
+        except (ValueError, TypeError):
+            pass
+        else:
+            if not (
+                is_text
+                and (math.isinf(number) or math.isnan(number))
+                and string.lower() not in ["inf", "-inf", "nan"]
+            ):
+                return float, None if is_colored else number
+    if isinstance(string, bytes):
+        return bytes, None
     else:
-        return str
+        return str, None
 
 
 def _afterpoint(string):
@@ -932,16 +1386,13 @@ def _afterpoint(string):
     2
 
     """
+    pos = string.rfind(".")
+    pos = string.lower().rfind("e") if pos < 0 else pos
+    if pos < 0:
+        return -1  # no point
+    # integers are never written with a point or an exponent
     if _isnumber(string) or _isnumber_with_thousands_separator(string):
-        if _isint(string):
-            return -1
-        else:
-            pos = string.rfind(".")
-            pos = string.lower().rfind("e") if pos < 0 else pos
-            if pos >= 0:
-                return len(string) - pos - 1
-            else:
-                return -1  # no point
+        return len(string) - pos - 1
     else:
         return -1  # not a number
 
@@ -1011,8 +1462,8 @@ def _visible_width(s):
 
     """
     # optional wide-character support
-    if wcwidth is not None and WIDE_CHARS_MODE:
-        len_fn = wcwidth.wcswidth
+    if current_settings().wide_chars_mode:
+        len_fn = _wcswidth
     else:
         len_fn = len
     if isinstance(s, (str, bytes)):
@@ -1023,9 +1474,63 @@ def _visible_width(s):
 
 def _is_multiline(s):
     if isinstance(s, str):
-        return bool(re.search(_multiline_codes, s))
+        return bool(_multiline_codes.search(s))
     else:  # a bytestring
-        return bool(re.search(_multiline_codes_bytes, s))
+        return bool(_multiline_codes_bytes.search(s))
+
+
+def _is_printable_ascii(s):
+    "Whether every character of a string is one column wide."
+    return s.isascii() and s.isprintable()
+
+
+def _find_invisible_and_multiline(values, find_multiline=True):
+    """Look for ANSI codes and line breaks in values.
+
+    Return (has_invisible, is_multiline). Stop as soon as everything asked
+    for is found. Printable ASCII values, the vast majority of them, can
+    have neither and are dismissed cheaply.
+    """
+    has_invisible = False
+    is_multiline = False
+    for chunk in _plain_text_chunks(values):
+        for val in chunk:
+            if val is None or type(val) in (int, float, bool):
+                continue
+            s = _to_str(val)
+            if _is_printable_ascii(s):
+                continue
+            if not has_invisible and "\x1b" in s:
+                has_invisible = _ansi_codes.search(s) is not None
+            if find_multiline and not is_multiline:
+                is_multiline = "\n" in s or "\r" in s
+            if has_invisible and (is_multiline or not find_multiline):
+                return has_invisible, is_multiline
+    return has_invisible, is_multiline
+
+
+def _all_printable_ascii(strings):
+    "Whether every character of a column of strings is one column wide."
+    return next(_plain_text_chunks(strings), None) is None
+
+
+def _plain_text_chunks(values, size=1024):
+    """Yield the chunks of `size` values which are not all printable ASCII.
+
+    A chunk of strings is checked all at once, which is much faster than
+    checking its values one by one.
+    """
+    values = iter(values)
+    while True:
+        chunk = list(islice(values, size))
+        if not chunk:
+            return
+        try:
+            if _is_printable_ascii("".join(chunk)):
+                continue
+        except TypeError:  # not only strings
+            pass
+        yield chunk
 
 
 def _multiline_width(multiline_s, line_width_fn=len):
@@ -1033,14 +1538,52 @@ def _multiline_width(multiline_s, line_width_fn=len):
     return max(map(line_width_fn, re.split("[\r\n]", multiline_s)))
 
 
-def _choose_width_fn(has_invisible, enable_widechars, is_multiline):
-    """Return a function to calculate visible cell width."""
+# The number of distinct strings whose widths are remembered by
+# _cached_width.
+_WIDTH_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=_WIDTH_CACHE_SIZE)
+def _cached_width(has_invisible, enable_widechars, s):
+    """Visible width of a single-line string.
+
+    Measuring the width of a string with wide characters or ANSI codes is
+    slow, and columns often have few distinct values, so the widths of the
+    strings seen last are remembered. See `width_cache_info`.
+    """
     if has_invisible:
-        line_width_fn = _visible_width
-    elif enable_widechars:  # optional wide-character support if available
-        line_width_fn = wcwidth.wcswidth
+        s = _strip_ansi(s)
+    if enable_widechars:
+        return _wcswidth(s)
     else:
-        line_width_fn = len
+        return len(s)
+
+
+def width_cache_info():
+    """Hits, misses and size of the cache of string widths.
+
+    >>> info = width_cache_info()
+    >>> info.maxsize
+    4096
+
+    """
+    return _cached_width.cache_info()
+
+
+def _line_width_fn(has_invisible, enable_widechars):
+    "The width function of a single line, like _visible_width or wcswidth."
+    if has_invisible:
+        # like _visible_width
+        return partial(_cached_width, True, current_settings().wide_chars_mode)
+    elif enable_widechars:  # optional wide-character support if available
+        return partial(_cached_width, False, True)
+    else:
+        return len
+
+
+def _choose_width_fn(has_invisible, enable_widechars, is_multiline):
+    """Return a function to calculate visible cell width."""
+    line_width_fn = _line_width_fn(has_invisible, enable_widechars)
     if is_multiline:
         def width_fn(s): return _multiline_width(s, line_width_fn)  # noqa
     else:
@@ -1048,40 +1591,47 @@ def _choose_width_fn(has_invisible, enable_widechars, is_multiline):
     return width_fn
 
 
-def _align_column_choose_padfn(strings, alignment, has_invisible):
+def _align_column_choose_padfn(
+    strings, alignment, has_invisible, decimals=None, maxdecimals=None
+):
+    preserve_whitespace = current_settings().preserve_whitespace
     if alignment == "right":
-        if not PRESERVE_WHITESPACE:
+        if not preserve_whitespace:
             strings = [s.strip() for s in strings]
         padfn = _padleft
     elif alignment == "center":
-        if not PRESERVE_WHITESPACE:
+        if not preserve_whitespace:
             strings = [s.strip() for s in strings]
         padfn = _padboth
     elif alignment == "decimal":
-        if has_invisible:
-            decimals = [_afterpoint(_strip_ansi(s)) for s in strings]
+        if decimals is None:
+            decimals = _column_decimals(strings, has_invisible)
+        if maxdecimals is None:
+            maxdecimals = max(decimals)
         else:
-            decimals = [_afterpoint(s) for s in strings]
-        maxdecimals = max(decimals)
+            maxdecimals = max(max(decimals), maxdecimals)
         strings = [s + (maxdecimals - decs) * " " for s,
                    decs in zip(strings, decimals)]
         padfn = _padleft
     elif not alignment:
         padfn = _padnone
     else:
-        if not PRESERVE_WHITESPACE:
+        if not preserve_whitespace:
             strings = [s.strip() for s in strings]
         padfn = _padright
     return strings, padfn
 
 
-def _align_column_choose_width_fn(has_invisible, enable_widechars, is_multiline):
+def _column_decimals(strings, has_invisible):
+    """Symbols after the decimal point for every string of a column."""
     if has_invisible:
-        line_width_fn = _visible_width
-    elif enable_widechars:  # optional wide-character support if available
-        line_width_fn = wcwidth.wcswidth
+        return [_afterpoint(_strip_ansi(s)) for s in strings]
     else:
-        line_width_fn = len
+        return [_afterpoint(s) for s in strings]
+
+
+def _align_column_choose_width_fn(has_invisible, enable_widechars, is_multiline):
+    line_width_fn = _line_width_fn(has_invisible, enable_widechars)
     if is_multiline:
         def width_fn(s): return _align_column_multiline_width(s, line_width_fn)  # noqa
     else:
@@ -1112,10 +1662,34 @@ def _align_column(
     has_invisible=True,
     enable_widechars=False,
     is_multiline=False,
+    decimals=None,
+    maxdecimals=None,
 ):
-    """[string] -> [padded_string]"""
+    """[string] -> [padded_string]
+
+    `decimals` are the precomputed _afterpoint values of the strings,
+    they are used only for the "decimal" alignment. The decimal points are
+    put at `maxdecimals` symbols from the end, if it is more than the most
+    decimals of the strings.
+    """
+    if hasattr(strings, "dtype"):  # from _format_numeric_array
+        padded_strings = _align_string_array(strings, alignment, minwidth, decimals)
+        if padded_strings is not None:
+            return padded_strings
+        strings = strings.tolist()
+        decimals = None
     strings, padfn = _align_column_choose_padfn(
-        strings, alignment, has_invisible)
+        strings, alignment, has_invisible, decimals, maxdecimals)
+    if not (has_invisible or enable_widechars or is_multiline):
+        # plain text: a width is a length, and the str methods pad strings
+        # the same way as padfn does
+        maxwidth = max(max(map(len, strings)), minwidth)
+        if padfn is _padleft:
+            return [s.rjust(maxwidth) for s in strings]
+        elif padfn is _padright:
+            return [s.ljust(maxwidth) for s in strings]
+        else:
+            return [padfn(maxwidth, s) for s in strings]
     width_fn = _align_column_choose_width_fn(
         has_invisible, enable_widechars, is_multiline
     )
@@ -1159,25 +1733,9 @@ def _align_column(
     return padded_strings
 
 
-def _more_generic(type1, type2):
-    types = {
-        type(None): 0,
-        bool: 1,
-        int: 2,
-        float: 3,
-        bytes: 4,
-        str: 5,
-    }
-    invtypes = {
-        5: str,
-        4: bytes,
-        3: float,
-        2: int,
-        1: bool,
-        0: type(None),
-    }
-    moregeneric = max(types.get(type1, 5), types.get(type2, 5))
-    return invtypes[moregeneric]
+# Column types from the least to the most generic one.
+_generic_types = [type(None), bool, int, float, bytes, str]
+_type_genericity = {t: i for i, t in enumerate(_generic_types)}
 
 
 def _column_type(strings, has_invisible=True, numparse=True):
@@ -1202,8 +1760,78 @@ def _column_type(strings, has_invisible=True, numparse=True):
     True
 
     """
-    types = [_type(s, has_invisible, numparse) for s in strings]
-    return reduce(_more_generic, types, bool)
+    return _parse_column(strings, has_invisible, numparse)[0]
+
+
+def _parse_column(strings, has_invisible=True, numparse=True):
+    """The column type and the parsed numeric values of a float column.
+
+    Returns (coltype, numbers). `numbers` is a list with the result of
+    _parse_value for every value if the column type is float, and None
+    otherwise. No more values are parsed once a column is known to be str.
+
+    >>> _parse_column(["1", 2.5, None])
+    (<class 'float'>, [1, 2.5, None])
+    >>> _parse_column(["1", "spam", "2"])
+    (<class 'str'>, None)
+
+    """
+    if numparse and _is_numeric_array(strings):
+        # NumPy scalars are never of type int or bool, they are parsed as floats
+        return float, None
+    most_generic = len(_generic_types) - 1
+    genericity = _type_genericity[bool]
+    numbers = []
+    for s in strings:
+        valtype, number = _parse_value(s, has_invisible, numparse)
+        if _type_genericity[valtype] > genericity:
+            genericity = _type_genericity[valtype]
+            if genericity == most_generic:
+                return str, None
+        numbers.append(number)
+    coltype = _generic_types[genericity]
+    return coltype, numbers if coltype is float else None
+
+
+def _check_column_type(column, values, coltype, has_invisible=True):
+    """Raise ValueError if a value of an int or float column isn't a number
+    of its type (an int, or a number).
+
+    Only these columns are checked, the values of any other type are all
+    formatted as text. None is a missing value in any column, and booleans
+    (also "True" and "False") count as ints, as they do in _column_type.
+
+    >>> _check_column_type(1, [1, "2", "True", None], int)
+    >>> _check_column_type(1, [1, "2.5"], int)
+    Traceback (most recent call last):
+        ...
+    ValueError: column 1 of type int has a value '2.5'
+
+    """
+    if coltype is int:
+        is_valid, exact_types = _isint, (int, bool)
+    elif coltype is float:
+        is_valid, exact_types = _isnumber, (int, float, bool)
+    else:
+        return
+    if _is_numeric_array(values):
+        return
+    for value in values:
+        if value is None or type(value) in exact_types:
+            continue
+        plain = value
+        if has_invisible and isinstance(value, (str, bytes)):
+            plain = _strip_ansi(value)
+        if not is_valid(plain) and not _isbool(plain):
+            import numbers  # e.g. NumPy scalars are registered there
+
+            number_type = numbers.Integral if coltype is int else numbers.Real
+            if not isinstance(value, number_type):
+                raise ValueError(
+                    "column {} of type {} has a value {!r}".format(
+                        column, coltype.__name__, value
+                    )
+                )
 
 
 def _format(val, valtype, floatfmt, intfmt, missingval="", has_invisible=True):
@@ -1242,12 +1870,117 @@ def _format(val, valtype, floatfmt, intfmt, missingval="", has_invisible=True):
         return f"{val}"
 
 
+def _format_column(
+    values,
+    valtype,
+    numbers,
+    floatfmt,
+    intfmt,
+    missingval="",
+    has_invisible=True,
+    decimal=False,
+):
+    """Format the values of a column of type `valtype`.
+
+    `numbers` are the numeric values from _parse_column, they are converted
+    again only for the values they are missing for. Returns the formatted
+    strings and, if `decimal` is true, the number of symbols after the
+    decimal point in each of them (see _afterpoint), otherwise None.
+
+    >>> _format_column(["1", 2.5, None], float, [1, 2.5, None], ".2f", "", "?", \
+                       False, True)
+    (['1.00', '2.50', '?'], [2, 2, -1])
+
+    """
+    if valtype is float and _is_numeric_array(values):
+        return _format_numeric_array(values, floatfmt, decimal)
+    elif valtype is str:
+        strings = [missingval if v is None else f"{v}" for v in values]
+    elif valtype is float and numbers is not None:
+        strings = [
+            format(float(n), floatfmt)
+            if n is not None
+            else _format(v, valtype, floatfmt, intfmt, missingval, has_invisible)
+            for v, n in zip(values, numbers)
+        ]
+    else:
+        strings = [
+            _format(v, valtype, floatfmt, intfmt, missingval, has_invisible)
+            for v in values
+        ]
+    decimals = _column_decimals(strings, has_invisible) if decimal else None
+    return strings, decimals
+
+
+# float formats which give the same result with the % operator
+_printf_floatfmt = _LazyPattern(r"[+ ]?[0-9]*(\.[0-9]+)?[eEfFgG]")
+
+
+def _format_numeric_array(values, floatfmt, decimal=False):
+    """Vectorized _format_column for a float column of a NumPy array.
+
+    Returns NumPy arrays of the formatted strings and of the decimals, or
+    lists if the format gives other than printable ASCII strings.
+    """
+    import numpy as np
+
+    numbers = values.astype(float)
+    if isinstance(floatfmt, str) and _printf_floatfmt.fullmatch(floatfmt):
+        strings = np.char.mod("%" + floatfmt, numbers)
+        if decimal:
+            # the same as _afterpoint, every string with a point is a number
+            pos = np.char.rfind(strings, ".")
+            pos = np.where(pos < 0, np.char.rfind(np.char.lower(strings), "e"), pos)
+            decimals = np.where(pos < 0, -1, np.char.str_len(strings) - pos - 1)
+        else:
+            decimals = None
+    else:
+        strings = [format(n, floatfmt) for n in numbers.tolist()]
+        decimals = _column_decimals(strings, False) if decimal else None
+        if not _all_printable_ascii(strings):
+            return strings, decimals  # e.g. a non-ASCII fill character
+        strings = np.array(strings, dtype=str)
+        decimals = np.array(decimals) if decimal else None
+    return strings, decimals
+
+
+def _align_string_array(strings, alignment, minwidth=0, decimals=None):
+    """Vectorized _align_column for a NumPy array of formatted numbers.
+
+    The strings must be single-line, printable ASCII. Returns a list of
+    padded strings, or None for the alignments it doesn't handle.
+    """
+    import numpy as np
+
+    preserve_whitespace = current_settings().preserve_whitespace
+    if alignment == "decimal":
+        if decimals is None:
+            decimals = np.array(_column_decimals(strings.tolist(), False))
+        strings = np.char.add(
+            strings, np.char.multiply(" ", decimals.max() - decimals))
+        padfn = np.char.rjust
+    elif alignment == "right":
+        if not preserve_whitespace:
+            strings = np.char.strip(strings)
+        padfn = np.char.rjust
+    elif alignment == "center":
+        return None  # str.center and _padboth break ties differently
+    elif not alignment:
+        return strings.tolist()
+    else:
+        if not preserve_whitespace:
+            strings = np.char.strip(strings)
+        padfn = np.char.ljust
+    maxwidth = max(int(np.char.str_len(strings).max()), minwidth)
+    return padfn(strings, maxwidth).tolist()
+
+
 def _align_header(
     header, alignment, width, visible_width, is_multiline=False, width_fn=None
 ):
     "Pad string header to width chars given known visible_width of the header."
     if is_multiline:
-        header_lines = re.split(_multiline_codes, header)
+        header_lines = _multiline_codes.split(header)
         padded_lines = [
             _align_header(h, alignment, width, width_fn(h)) for h in header_lines
         ]
@@ -1285,6 +2018,24 @@ def _reinsert_separating_lines(rows, separating_lines):
             rows.insert(index, SEPARATING_LINE)
 
 
+def _iter_reinsert_separating_lines(rows, separating_lines):
+    """Like _reinsert_separating_lines, but for a lazy iterable of rows."""
+    if not separating_lines:
+        yield from rows
+        return
+    separating_lines = set(separating_lines)
+    pos = 0
+    for row in rows:
+        while pos in separating_lines:
+            yield SEPARATING_LINE
+            pos += 1
+        yield row
+        pos += 1
+    while pos in separating_lines:
+        yield SEPARATING_LINE
+        pos += 1
+
+
 def _prepend_row_index(rows, index):
     """Add a left-most index column."""
     if index is None or index is False:
@@ -1305,6 +2056,146 @@ def _prepend_row_index(rows, index):
     return rows
 
 
+def _choose_row_index(showindex, index, nrows):
+    """The values of the index column to show, or None (see `showindex`).
+
+    `index` is the own index of the data, if it has one.
+    """
+    showindex_is_a_str = type(showindex) in [str, bytes]
+    if showindex == "default" and index is not None:
+        return index
+    elif isinstance(showindex, Sized) and not showindex_is_a_str:
+        return list(showindex)
+    elif isinstance(showindex, Iterable) and not showindex_is_a_str:
+        return showindex
+    elif showindex == "always" or (_bool(showindex) and not showindex_is_a_str):
+        if index is None:
+            index = list(range(nrows))
+        return index
+    else:  # showindex == "never" or (not _bool(showindex) and not showindex_is_a_str)
+        return None
+
+
+def _is_numeric_array(values):
+    "Whether values are a one-dimensional NumPy array of (real) numbers."
+    dtype = getattr(values, "dtype", None)
+    return (
+        dtype is not None
+        and getattr(values, "ndim", None) == 1
+        and getattr(dtype, "kind", None) in ("b", "i", "u", "f")
+    )
+
+
+def _normalize_numpy_columns(tabular_data, headers, showindex="default"):
+    """Split a numeric 2D NumPy array or a record array into columns.
+
+    Return a list of columns and a list of headers like
+    _normalize_tabular_data would, but keep the numeric columns as
+    one-dimensional NumPy arrays, so that they can be formatted and
+    measured without converting every number to a Python object. Other
+    columns are lists. Return None if the data is anything else, or if it
+    gets no benefit from this.
+
+    """
+    dtype = getattr(tabular_data, "dtype", None)
+    ndim = getattr(tabular_data, "ndim", None)
+    if dtype is None or ndim is None or not len(tabular_data):
+        return None
+    if getattr(dtype, "names", None) and ndim == 1:
+        # numpy record array
+        keys = list(dtype.names)
+        cols = [tabular_data[name] for name in keys]
+    elif ndim == 2 and dtype.kind in ("b", "i", "u", "f"):
+        keys = list(map(str, range(tabular_data.shape[1])))
+        cols = list(tabular_data.T)
+    else:
+        return None
+    # other columns are normalized to the same scalars _normalize_tabular_data gets
+    cols = [col if _is_numeric_array(col) else list(col) for col in cols]
+    if not any(map(_is_numeric_array, cols)):
+        return None
+
+    try:
+        bool(headers)
+    except ValueError:  # numpy.ndarray, pandas.core.index.Index, ...
+        headers = list(headers)
+    if headers == "firstrow":
+        return None  # the first row becomes strings, let _normalize_tabular_data do it
+    elif headers == "keys":
+        headers = keys
+    headers = list(map(str, headers))
+
+    return _add_index_column(cols, headers, showindex, len(tabular_data))
+
+
+def _normalize_columns(tabular_data, headers, showindex="default"):
+    """Split a dict of iterables into columns without transposing it.
+
+    Return a list of columns and a list of headers like
+    _normalize_tabular_data would. Numeric NumPy arrays are kept as they
+    are (see _normalize_numpy_columns), other columns become lists padded
+    with None to the same length. Return None if the data is anything else,
+    or if it is better left to _normalize_tabular_data.
+
+    >>> _normalize_columns({"a": [1, 2], "b": "x"}, "keys")
+    ([[1, 2], ['x', None]], ['a', 'b'])
+
+    """
+    values = getattr(tabular_data, "values", None)
+    if not hasattr(tabular_data, "keys") or not callable(values):
+        return None  # not a conventional dict
+    cols = [
+        col if _is_numeric_array(col) and type(col).__name__ == "ndarray"
+        else list(col)
+        for col in values()
+    ]
+    nrows = max(map(len, cols), default=0)
+    if not nrows:
+        return None
+    # a row of separating lines, see _is_separating_line
+    if any(
+        isinstance(col, list) and SEPARATING_LINE in col for col in cols[:2]
+    ):
+        return None
+    for i, col in enumerate(cols):
+        if len(col) < nrows:
+            cols[i] = list(col) + [None] * (nrows - len(col))
+
+    try:
+        bool(headers)
+    except ValueError:  # numpy.ndarray, pandas.core.index.Index, ...
+        headers = list(headers)
+    if headers == "firstrow":
+        return None
+    elif headers == "keys":
+        headers = list(map(str, tabular_data.keys()))
+    headers = list(map(str, headers))
+
+    return _add_index_column(cols, headers, showindex, nrows)
+
+
+def _add_index_column(cols, headers, showindex, nrows):
+    """Add an index column to the columns if `showindex` asks for one.
+
+    Return the columns and the headers, padded for the columns they lack.
+    """
+    index = _choose_row_index(showindex, None, nrows)
+    if index is not None:
+        if isinstance(index, Sized) and len(index) != nrows:
+            raise ValueError(
+                "index must be as long as the number of data rows: "
+                + "len(index)={} len(rows)={}".format(len(index), nrows)
+            )
+        index_iter = iter(index)
+        cols.insert(0, [next(index_iter) for _ in range(nrows)])
+
+    # pad with empty headers for initial columns if necessary
+    if headers and len(headers) < len(cols):
+        headers = [""] * (len(cols) - len(headers)) + headers
+
+    return cols, headers
+
+
 def _bool(val):
     "A wrapper around standard bool() which doesn't throw on NumPy arrays"
     try:
@@ -1449,11 +2340,14 @@ def _normalize_tabular_data(tabular_data, headers, showindex="default"):
             headers = [column[0] for column in tabular_data.description]
 
         elif (
-            dataclasses is not None
+            # there are no dataclasses unless the module has been imported
+            "dataclasses" in sys.modules
             and len(rows) > 0
-            and dataclasses.is_dataclass(rows[0])
+            and sys.modules["dataclasses"].is_dataclass(rows[0])
         ):
             # Python 3.7+'s dataclass
+            import dataclasses
+
             field_names = [field.name for field in dataclasses.fields(rows[0])]
             if headers == "keys":
                 headers = field_names
@@ -1480,19 +2374,7 @@ def _normalize_tabular_data(tabular_data, headers, showindex="default"):
     rows = list(map(lambda r: r if _is_separating_line(r) else list(r), rows))
 
     # add or remove an index column
-    showindex_is_a_str = type(showindex) in [str, bytes]
-    if showindex == "default" and index is not None:
-        rows = _prepend_row_index(rows, index)
-    elif isinstance(showindex, Sized) and not showindex_is_a_str:
-        rows = _prepend_row_index(rows, list(showindex))
-    elif isinstance(showindex, Iterable) and not showindex_is_a_str:
-        rows = _prepend_row_index(rows, showindex)
-    elif showindex == "always" or (_bool(showindex) and not showindex_is_a_str):
-        if index is None:
-            index = list(range(len(rows)))
-        rows = _prepend_row_index(rows, index)
-    elif showindex == "never" or (not _bool(showindex) and not showindex_is_a_str):
-        pass
+    rows = _prepend_row_index(rows, _choose_row_index(showindex, index, len(rows)))
 
     # pad with empty headers for initial columns if necessary
     if headers and len(rows) > 0:
@@ -1504,36 +2386,69 @@ def _normalize_tabular_data(tabular_data, headers, showindex="default"):
     return rows, headers
 
 
+# The most wrapped strings remembered for a column by _wrap_text_to_colwidths.
+_WRAP_CACHE_SIZE = 4096
+
+
 def _wrap_text_to_colwidths(list_of_lists, colwidths, numparses=True):
     numparses = _expand_iterable(numparses, len(list_of_lists[0]), True)
 
+    # the wrappers are reused for every cell of the same width, and the
+    # cells which are strings are wrapped once for every distinct value
+    wrappers = {}
+    wrapped_cells = [{} for _ in colwidths]
     result = []
 
     for row in list_of_lists:
         new_row = []
-        for cell, width, numparse in zip(row, colwidths, numparses):
-            if _isnumber(cell) and numparse:
+        for cell, width, numparse, wrapped_column in zip(
+            row, colwidths, numparses, wrapped_cells
+        ):
+            if width is None:
                 new_row.append(cell)
-                continue
-
-            if width is not None:
-                wrapper = _CustomTextWrap(width=width)
-                # Cast based on our internal type handling
-                # Any future custom formatting of types (such as datetimes)
-                # may need to be more explicit than just `str` of the object
-                casted_cell = (
-                    str(cell) if _isnumber(cell) else _type(
-                        cell, numparse)(cell)
-                )
-                wrapped = wrapper.wrap(casted_cell)
-                new_row.append("\n".join(wrapped))
+            elif type(cell) is str:
+                wrapped = wrapped_column.get(cell)
+                if wrapped is None:
+                    wrapped = _wrap_cell(cell, width, numparse, wrappers)
+                    if len(wrapped_column) < _WRAP_CACHE_SIZE:
+                        wrapped_column[cell] = wrapped
+                new_row.append(wrapped)
             else:
-                new_row.append(cell)
+                new_row.append(_wrap_cell(cell, width, numparse, wrappers))
         result.append(new_row)
 
     return result
 
 
+def _wrap_cell(cell, width, numparse, wrappers):
+    """Wrap the text of a cell to `width`; numbers are left alone.
+
+    `wrappers` holds the text wrappers made so far, by width and kind.
+    """
+    if _isnumber(cell) and numparse:
+        return cell
+
+    # Cast based on our internal type handling
+    # Any future custom formatting of types (such as datetimes)
+    # may need to be more explicit than just `str` of the object
+    casted_cell = str(cell) if _isnumber(cell) else _type(cell, numparse)(cell)
+
+    # the text only needs the wide-character and ANSI code handling
+    # of _CustomTextWrap if it has anything but ASCII
+    if not isinstance(casted_cell, str) or "\x1b" in casted_cell:
+        wrapper_class = _CustomTextWrap
+    elif _is_printable_ascii(
+        casted_cell.translate(textwrap.TextWrapper.unicode_whitespace_trans)
+    ):
+        wrapper_class = _AsciiTextWrap
+    else:
+        wrapper_class = _PlainTextWrap
+    wrapper = wrappers.get((width, wrapper_class))
+    if wrapper is None:
+        wrapper = wrappers[width, wrapper_class] = wrapper_class(width=width)
+    return "\n".join(wrapper.wrap(casted_cell))
+
+
 def _to_str(s, encoding="utf8", errors="ignore"):
     """
     A type safe wrapper for converting a bytestring to str. This is essentially just
@@ -1559,6 +2474,88 @@ def _to_str(s, encoding="utf8", errors="ignore"):
     return str(s)
 
 
+# The tables rendered last by `tabulate`, by _render_key, oldest first.
+_render_cache = OrderedDict()
+_render_cache_lock = threading.Lock()
+_render_cache_stats = {"hits": 0, "misses": 0}
+
+_RenderCacheInfo = namedtuple(
+    "RenderCacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+def _render_key(tabular_data, options, cache_key=None):
+    """A fingerprint of a table to render, or None if it can't be taken.
+
+    The data (or the `cache_key` which stands for it) and the options are
+    pickled together with the current settings and hashed. Pickles tell
+    apart values which compare equal but look different in a table, such
+    as 1, 1.0 and True. Only lists, tuples and dicts of data are pickled:
+    other data, e.g. an iterator of rows, a database cursor or a
+    DataFrame, has no fingerprint without a `cache_key`, nor has data
+    which can't be pickled.
+    """
+    if cache_key is not None:
+        data = ("cache_key", cache_key)
+    elif type(tabular_data) in (list, tuple, dict):
+        data = ("data", tabular_data)
+    else:
+        return None
+
+    import hashlib
+    import pickle
+
+    settings = tuple(current_settings())
+    try:
+        data = pickle.dumps((data, options, settings), pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        return None
+    return hashlib.blake2b(data, digest_size=20).digest()
+
+
+def _cached_render(key):
+    with _render_cache_lock:
+        table = _render_cache.get(key)
+        if table is None:
+            _render_cache_stats["misses"] += 1
+        else:
+            _render_cache_stats["hits"] += 1
+            _render_cache.move_to_end(key)
+        return table
+
+
+def _cache_render(key, table):
+    with _render_cache_lock:
+        _render_cache[key] = table
+        while len(_render_cache) > max(RENDER_CACHE_SIZE, 0):
+            _render_cache.popitem(last=False)
+
+
+def render_cache_info():
+    """Hits, misses, maximum and current size of the cache of tables.
+
+    The cache is off unless RENDER_CACHE_SIZE is set to the number of tables
+    to remember:
+
+    >>> render_cache_info().maxsize
+    0
+
+    """
+    with _render_cache_lock:
+        return _RenderCacheInfo(
+            _render_cache_stats["hits"],
+            _render_cache_stats["misses"],
+            RENDER_CACHE_SIZE,
+            len(_render_cache),
+        )
+
+
+def render_cache_clear():
+    """Forget the tables remembered by `tabulate` and reset the statistics."""
+    with _render_cache_lock:
+        _render_cache.clear()
+        _render_cache_stats.update(hits=0, misses=0)
+
+
 def tabulate(
     tabular_data,
     headers=(),
@@ -1574,6 +2571,13 @@ def tabulate(
     maxcolwidths=None,
     rowalign=None,
     maxheadercolwidths=None,
+    coltypes=None,
+    headtail=None,
+    headtailwidths="shown",
+    stats=None,
+    file=None,
+    encoding=None,
+    cache_key=None,
 ):
     """Format a fixed width table for pretty printing.
 
@@ -2050,172 +3054,1891 @@ def tabulate(
 
     Header column width can be specified in a similar way using `maxheadercolwidth`
 
+    Column types
+    ------------
+    If the types of the columns are known in advance, they can be passed as
+    `coltypes`, a list with one of `str`, `bytes`, `float`, `int`, `bool` or
+    `type(None)` per column. No type detection is done for such columns,
+    which saves parsing every value. `None` in the list (or a list shorter
+    than the number of columns) leaves the type detection on. The explicit
+    types take precedence over `disable_numparse`. The index column added
+    by `showindex` is a column too, the first one.
+
+    >>> print(tabulate([["007", "1.5"], ["42", "3"]], coltypes=[str, float]))
+    ---  ---
+    007  1.5
+    42   3
+    ---  ---
+
+    Every value of an `int` column must be an integer (or a string of one),
+    and every value of a `float` column a number, or None for a missing
+    value; anything else is a ValueError naming the column (counted from
+    0). The values of the other types are formatted as text whatever they
+    are.
+
+    >>> tabulate([["spam", 1], ["eggs", "n/a"]], coltypes=[str, int])
+    Traceback (most recent call last):
+        ...
+    ValueError: column 1 of type int has a value 'n/a'
+
+    Head and tail
+    -------------
+    To look at a big table without rendering all of it, pass `headtail=k`:
+    only the first `k` and the last `k` rows are shown, with a row of
+    ellipses in between (if there are more than `2 * k` rows). The column
+    widths and types are those of the rows shown, so the rows in between
+    are neither formatted nor measured. With `headtailwidths="all"` they
+    are those of all the rows, and the columns are as wide as in the whole
+    table. Columns narrower than the ellipsis are widened to fit it.
+
+    >>> print(tabulate([[i, i * 1.5] for i in range(100)], headtail=2))
+    ---  -----
+      0    0
+      1    1.5
+    ...    ...
+     98  147
+     99  148.5
+    ---  -----
+
+    Timing
+    ------
+    To find out where the time goes, pass a function as `stats`. Once the
+    table is done, it is called as `stats(phase, seconds, peak)` for each
+    phase of the rendering, in order: "normalize" (of the tabular data),
+    "separating_lines", "wrap" (with `maxcolwidths` or
+    `maxheadercolwidths`), "scan" (for ANSI codes and multiline cells),
+    "types", "format" and "align" (of the columns, added up over all of
+    them), "headers" and "format_table". If the columns are laid out in a
+    pool of processes (see PARALLEL_MIN_CELLS), "types", "format" and
+    "align" are reported together as "columns"; a table without columns has
+    none of these phases. `peak` is the most memory allocated during a
+    phase (the most for any column) if `tracemalloc` is tracing, and None
+    otherwise. The peak of tracemalloc isn't reset, so that a caller's own
+    measurement isn't changed, and a phase which doesn't reach a new peak
+    gets only the memory it still holds when it ends: peaks are
+    approximate, at least for phases after a bigger one.
+
+    >>> phases = []
+    >>> _ = tabulate([[1, 2]], stats=lambda phase, seconds, peak: phases.append(phase))
+    >>> phases
+    ['normalize', 'separating_lines', 'scan', 'types', 'format', 'align', 'headers', 'format_table']
+    >>> phases = []
+    >>> _ = tabulate([], stats=lambda phase, seconds, peak: phases.append(phase))
+    >>> phases
+    ['normalize', 'separating_lines', 'scan', 'headers', 'format_table']
+
+    Caching
+    -------
+    Programs which print the same table over and over can set the module
+    variable RENDER_CACHE_SIZE to the number of tables to remember. A table
+    is then rendered only once for the same data (compared by its pickle)
+    and options, and the same string is returned every time after that.
+    Only data in a list, tuple or dict is compared, and pickling it takes
+    time on every call, if a lot less than rendering it does (see
+    benchmarks/render_cache.py). A caller which knows when its data
+    changes can pass a `cache_key` instead, e.g. a version number of the
+    data: the data isn't looked at then, and the table rendered first for
+    a key and the options is returned for them until it is forgotten. This
+    works for any data, such as a database cursor. Tables are not cached
+    if their data (or key) can't be pickled, or if `stats` is given. See
+    `render_cache_info` and `render_cache_clear`.
+
+    Writing to files
+    ----------------
+    With a `file`, the table is written to it line by line, a chunk of
+    lines at a time, instead of being returned as a string. What is written
+    is the same as what `print(tabulate(...), file=file)` writes, without
+    ever having all of the table in a single string. A binary file gets the
+    lines encoded, in UTF-8 unless an `encoding` is given. A text file
+    (io.TextIOBase) encodes what is written to it itself, so giving it an
+    `encoding` is a TypeError; other objects with a `write` method get
+    strings, or bytes if an `encoding` is given.
+
+    >>> out = io.BytesIO()
+    >>> tabulate([["spam", 41.9999], ["eggs", "451.0"]], file=out)
+    >>> out.getvalue()
+    b'----  --------\\nspam   41.9999\\neggs  451\\n----  --------\\n'
+    >>> tabulate([["spam", 1]], file=io.StringIO(), encoding="latin-1")
+    Traceback (most recent call last):
+      ...
+    TypeError: an encoding can't be given for a text file
+
+    Settings
+    --------
+    The module variables MIN_PADDING, PRESERVE_WHITESPACE and WIDE_CHARS_MODE
+    apply to every thread. Threads which render tables with settings of
+    their own at the same time make them in a `local_settings` block:
+
+    >>> with local_settings(preserve_whitespace=True):
+    ...     print(tabulate([["  spam", 1]], tablefmt="plain"))
+      spam  1
+
     """
+    if file is not None:
+        encoding = _file_encoding(file, encoding)
+    key = None
+    if RENDER_CACHE_SIZE > 0 and stats is None:
+        key = _render_key(
+            tabular_data,
+            (
+                headers,
+                tablefmt,
+                floatfmt,
+                intfmt,
+                numalign,
+                stralign,
+                missingval,
+                showindex,
+                disable_numparse,
+                colalign,
+                maxcolwidths,
+                rowalign,
+                maxheadercolwidths,
+                coltypes,
+                headtail,
+                headtailwidths,
+            ),
+            cache_key,
+        )
+        if key is not None:
+            table = _cached_render(key)
+            if table is not None:
+                if file is not None:
+                    _write_lines(file, [table] if table else [], encoding)
+                    return None
+                return table
+
+    timer = _PhaseTimer(stats)
+    layout = _layout_table(
+        tabular_data,
+        headers,
+        tablefmt,
+        floatfmt=floatfmt,
+        intfmt=intfmt,
+        numalign=numalign,
+        stralign=stralign,
+        missingval=missingval,
+        showindex=showindex,
+        disable_numparse=disable_numparse,
+        colalign=colalign,
+        maxcolwidths=maxcolwidths,
+        rowalign=rowalign,
+        maxheadercolwidths=maxheadercolwidths,
+        coltypes=coltypes,
+        headtail=headtail,
+        headtailwidths=headtailwidths,
+        timer=timer,
+    )
+    started = timer.start()
+    if file is not None:
+        _write_lines(file, _iter_format_table(*layout[:7]), encoding)
+        timer.stop("format_table", started)
+        timer.report()
+        return None
+    table = _format_table(*layout[:7])
+    timer.stop("format_table", started)
+    timer.report()
+    if key is not None:
+        _cache_render(key, table)
+    return table
 
-    if tabular_data is None:
-        tabular_data = []
 
-    list_of_lists, headers = _normalize_tabular_data(
-        tabular_data, headers, showindex=showindex
-    )
-    list_of_lists, separating_lines = _remove_separating_lines(list_of_lists)
+# The number of lines `tabulate` writes to a file at a time.
+_WRITE_CHUNK_LINES = 1000
 
-    if maxcolwidths is not None:
-        num_cols = len(list_of_lists[0])
-        if isinstance(maxcolwidths, int):  # Expand scalar for all columns
-            maxcolwidths = _expand_iterable(
-                maxcolwidths, num_cols, maxcolwidths)
-        else:  # Ignore col width for any 'trailing' columns
-            maxcolwidths = _expand_iterable(maxcolwidths, num_cols, None)
 
-        numparses = _expand_numparse(disable_numparse, num_cols)
-        list_of_lists = _wrap_text_to_colwidths(
-            list_of_lists, maxcolwidths, numparses=numparses
-        )
+def _file_encoding(file, encoding=None):
+    """The encoding of what `tabulate` writes to `file`, or None for strings.
 
-    if maxheadercolwidths is not None:
-        num_cols = len(list_of_lists[0])
-        if isinstance(maxheadercolwidths, int):  # Expand scalar for all columns
-            maxheadercolwidths = _expand_iterable(
-                maxheadercolwidths, num_cols, maxheadercolwidths
-            )
-        else:  # Ignore col width for any 'trailing' columns
-            maxheadercolwidths = _expand_iterable(
-                maxheadercolwidths, num_cols, None)
+    Binary files get UTF-8 by default; text files take strings only.
+    """
+    if isinstance(file, io.TextIOBase):
+        if encoding is not None:
+            raise TypeError("an encoding can't be given for a text file")
+        return None
+    if encoding is None and isinstance(file, (io.RawIOBase, io.BufferedIOBase)):
+        return "utf-8"
+    return encoding
 
-        numparses = _expand_numparse(disable_numparse, num_cols)
-        headers = _wrap_text_to_colwidths(
-            [headers], maxheadercolwidths, numparses=numparses
-        )[0]
 
-    # empty values in the first column of RST tables should be escaped (issue #82)
-    # "" should be escaped as "\\ " or ".."
-    if tablefmt == "rst":
-        list_of_lists, headers = _rst_escape_first_column(
-            list_of_lists, headers)
+def _write_lines(file, lines, encoding=None):
+    """Write lines as `print("\\n".join(lines), file=file)` would.
 
-    # PrettyTable formatting does not use any extra padding.
-    # Numbers are not parsed and are treated the same as strings for alignment.
-    # Check if pretty is the format being used and override the defaults so it
-    # does not impact other formats.
-    min_padding = MIN_PADDING
-    if tablefmt == "pretty":
-        min_padding = 0
-        disable_numparse = True
-        numalign = "center" if numalign == _DEFAULT_ALIGN else numalign
-        stralign = "center" if stralign == _DEFAULT_ALIGN else stralign
-    else:
-        numalign = "decimal" if numalign == _DEFAULT_ALIGN else numalign
-        stralign = "left" if stralign == _DEFAULT_ALIGN else stralign
+    The lines are joined and written a chunk at a time by `file.write`;
+    they are encoded first if an `encoding` is given.
+    """
 
-    # optimization: look for ANSI control codes once,
-    # enable smart width functions only if a control code is found
-    #
-    # convert the headers and rows into a single, tab-delimited string ensuring
-    # that any bytestrings are decoded safely (i.e. errors ignored)
-    plain_text = "\t".join(
-        chain(
-            # headers
-            map(_to_str, headers),
-            # rows: chain the rows together into a single iterable after mapping
-            # the bytestring conversino to each cell value
-            chain.from_iterable(map(_to_str, row) for row in list_of_lists),
-        )
-    )
+    def iter_chunks():
+        lines_iter = iter(lines)
+        chunk = list(islice(lines_iter, _WRITE_CHUNK_LINES))
+        if not chunk:  # a completely empty table
+            yield "\n"
+        while chunk:
+            chunk.append("")  # a newline after the last line
+            yield "\n".join(chunk)
+            chunk = list(islice(lines_iter, _WRITE_CHUNK_LINES))
+
+    chunks = iter_chunks()
+    if encoding is not None:
+        import codecs
+
+        # one encoder for all the chunks writes a single byte order mark
+        encode = codecs.getincrementalencoder(encoding)().encode
+        chunks = map(encode, chunks)
+    for chunk in chunks:
+        file.write(chunk)
+
+
+def tabulate_iter(tabular_data, headers=(), tablefmt="simple", **kwargs):
+    """Render a table lazily, yielding the lines of its text one by one.
+
+    Accepts the same arguments as `tabulate`. The column widths still have
+    to be known before the first line can be produced, but the rendered
+    lines are never collected into a list or joined into a single string,
+    so the output of a big table can be written out as it is produced:
+
+    >>> for line in tabulate_iter([["spam", 41.9999], ["eggs", "451.0"]],
+    ...                           ["strings", "numbers"]):
+    ...     print(line)
+    strings      numbers
+    ---------  ---------
+    spam         41.9999
+    eggs        451
 
-    has_invisible = _ansi_codes.search(plain_text) is not None
+    `"\\n".join(tabulate_iter(...))` is the same as `tabulate(...)`. To
+    write a table straight to a file object, use `tabulate(..., file=fp)`.
 
-    enable_widechars = wcwidth is not None and WIDE_CHARS_MODE
-    if (
-        not isinstance(tablefmt, TableFormat)
-        and tablefmt in multiline_formats
-        and _is_multiline(plain_text)
-    ):
-        tablefmt = multiline_formats.get(tablefmt, tablefmt)
-        is_multiline = True
-    else:
-        is_multiline = False
-    width_fn = _choose_width_fn(has_invisible, enable_widechars, is_multiline)
+    """
+    layout = _layout_table(tabular_data, headers, tablefmt, **kwargs)
+    return _iter_format_table(*layout[:7])
 
-    # format rows and columns, convert numeric values to strings
-    cols = list(izip_longest(*list_of_lists))
-    numparses = _expand_numparse(disable_numparse, len(cols))
-    coltypes = [_column_type(col, numparse=np)
-                for col, np in zip(cols, numparses)]
-    if isinstance(floatfmt, str):  # old version
-        float_formats = len(cols) * [
-            floatfmt
-        ]  # just duplicate the string to use in each column
-    else:  # if floatfmt is list, tuple etc we have one per column
-        float_formats = list(floatfmt)
-        if len(float_formats) < len(cols):
-            float_formats.extend(
-                (len(cols) - len(float_formats)) * [_DEFAULT_FLOATFMT])
-    if isinstance(intfmt, str):  # old version
-        int_formats = len(cols) * [
-            intfmt
-        ]  # just duplicate the string to use in each column
-    else:  # if intfmt is list, tuple etc we have one per column
-        int_formats = list(intfmt)
-        if len(int_formats) < len(cols):
-            int_formats.extend((len(cols) - len(int_formats))
-                               * [_DEFAULT_INTFMT])
-    if isinstance(missingval, str):
-        missing_vals = len(cols) * [missingval]
-    else:
-        missing_vals = list(missingval)
-        if len(missing_vals) < len(cols):
-            missing_vals.extend(
-                (len(cols) - len(missing_vals)) * [_DEFAULT_MISSINGVAL])
-    cols = [
-        [_format(v, ct, fl_fmt, int_fmt, miss_v, has_invisible) for v in c]
-        for c, ct, fl_fmt, int_fmt, miss_v in zip(
-            cols, coltypes, float_formats, int_formats, missing_vals
+
+def tabulate_columns(columns, headers=(), tablefmt="simple", **kwargs):
+    """Format a table given column by column.
+
+    `columns` is a dict of columns (usually used with headers="keys") or a
+    sequence of them; each column is an iterable of its values. The other
+    arguments are those of `tabulate`. The columns are formatted as they
+    are, without building a list of rows first:
+
+    >>> print(tabulate_columns({"strings": ["spam", "eggs"],
+    ...                         "numbers": [41.9999, "451.0"]}, "keys"))
+    strings      numbers
+    ---------  ---------
+    spam         41.9999
+    eggs        451
+
+    Columns shorter than the others are padded with missing values.
+    `tabulate` handles a dict of columns the same way.
+    """
+    if not hasattr(columns, "keys") or not hasattr(columns, "values"):
+        columns = dict(enumerate(columns))
+    return tabulate(columns, headers, tablefmt, **kwargs)
+
+
+class Tabulator:
+    """Render many tables with the same options.
+
+    The options are those of `tabulate` and are set once. The parts of the
+    output which don't depend on the cells (horizontal lines, padding of
+    rows) are remembered between calls, so redrawing a table which keeps
+    its column widths only has to format the cells.
+
+    >>> render = Tabulator(tablefmt="grid", floatfmt=".1f")
+    >>> print(render([["spam", 41.9999], ["eggs", 451]], ["strings", "numbers"]))
+    +-----------+-----------+
+    | strings   |   numbers |
+    +===========+===========+
+    | spam      |      42.0 |
+    +-----------+-----------+
+    | eggs      |     451.0 |
+    +-----------+-----------+
+
+    """
+
+    # the number of format plans to remember
+    max_plans = 16
+
+    def __init__(
+        self,
+        tablefmt="simple",
+        floatfmt=_DEFAULT_FLOATFMT,
+        intfmt=_DEFAULT_INTFMT,
+        numalign=_DEFAULT_ALIGN,
+        stralign=_DEFAULT_ALIGN,
+        missingval=_DEFAULT_MISSINGVAL,
+        showindex="default",
+        disable_numparse=False,
+        colalign=None,
+        maxcolwidths=None,
+        rowalign=None,
+        maxheadercolwidths=None,
+        coltypes=None,
+        headtail=None,
+        headtailwidths="shown",
+    ):
+        self.tablefmt = tablefmt
+        self.options = dict(
+            floatfmt=floatfmt,
+            intfmt=intfmt,
+            numalign=numalign,
+            stralign=stralign,
+            missingval=missingval,
+            showindex=showindex,
+            disable_numparse=disable_numparse,
+            colalign=colalign,
+            maxcolwidths=maxcolwidths,
+            rowalign=rowalign,
+            maxheadercolwidths=maxheadercolwidths,
+            coltypes=coltypes,
+            headtail=headtail,
+            headtailwidths=headtailwidths,
         )
-    ]
+        self._plans = {}
+        self._plans_lock = threading.Lock()  # a Tabulator may be shared
+
+    def __call__(self, tabular_data, headers=(), file=None, encoding=None):
+        """Format a table, or write it to a `file`; see `tabulate`."""
+        layout = self._layout(tabular_data, headers)
+        if file is not None:
+            encoding = _file_encoding(file, encoding)
+            lines = _iter_format_table(*layout[:7], plan=self._plan(layout))
+            _write_lines(file, lines, encoding)
+            return None
+        return _format_table(*layout[:7], plan=self._plan(layout))
+
+    def iter_lines(self, tabular_data, headers=()):
+        """Yield the lines of a table one by one, see `tabulate_iter`."""
+        layout = self._layout(tabular_data, headers)
+        return _iter_format_table(*layout[:7], plan=self._plan(layout))
+
+    def _layout(self, tabular_data, headers):
+        return _layout_table(tabular_data, headers, self.tablefmt, **self.options)
+
+    def _plan(self, layout):
+        key = (
+            bool(layout.headers),
+            tuple(layout.colwidths),
+            tuple(layout.colaligns),
+            layout.is_multiline,
+        )
+        with self._plans_lock:
+            plan = self._plans.get(key)
+        if plan is None:
+            plan = _make_format_plan(
+                layout.fmt,
+                bool(layout.headers),
+                layout.colwidths,
+                layout.colaligns,
+                layout.is_multiline,
+            )
+            with self._plans_lock:
+                if len(self._plans) >= self.max_plans:
+                    del self._plans[next(iter(self._plans))]  # the oldest one
+                self._plans[key] = plan
+        return plan
+
+
+class PagedTable:
+    """Render a big table page by page, every page in the same columns.
+
+    The options are those of `tabulate`. The data is normalized and its
+    column widths, types and alignments are found once, when the object is
+    created; rendering a page then formats only the rows of the page, with
+    the settings (see `local_settings`) of the thread which created it.
+    Pages rendered separately line up exactly, and every row looks the
+    same as in the whole table rendered by `tabulate`:
+
+    >>> pages = PagedTable([["spam", 41.9999], ["eggs", 451.0], ["ham", 1.5]],
+    ...                    ["item", "qty"], "grid")
+    >>> len(pages)
+    3
+    >>> print(pages.page(0, 2))
+    +--------+----------+
+    | item   |      qty |
+    +========+==========+
+    | spam   |  41.9999 |
+    +--------+----------+
+    | eggs   | 451      |
+    +--------+----------+
+    >>> print(pages.page(2, 2))
+    +--------+----------+
+    | item   |      qty |
+    +========+==========+
+    | ham    |   1.5    |
+    +--------+----------+
+
+    This holds for cells which wcwidth can't measure too, such as a line
+    break in a format which isn't multiline:
+
+    >>> rows = [[2.0, "a\\nb", 100, 0]]
+    >>> with local_settings(wide_chars_mode=True):
+    ...     PagedTable(rows, tablefmt="fancy_outline").page() == tabulate(
+    ...         rows, tablefmt="fancy_outline")
+    True
+
+    """
+
+    def __init__(
+        self,
+        tabular_data,
+        headers=(),
+        tablefmt="simple",
+        floatfmt=_DEFAULT_FLOATFMT,
+        intfmt=_DEFAULT_INTFMT,
+        numalign=_DEFAULT_ALIGN,
+        stralign=_DEFAULT_ALIGN,
+        missingval=_DEFAULT_MISSINGVAL,
+        showindex="default",
+        disable_numparse=False,
+        colalign=None,
+        coltypes=None,
+    ):
+        if tabular_data is None:
+            tabular_data = []
+        rows, headers = _normalize_tabular_data(
+            tabular_data, headers, showindex=showindex
+        )
+        self.rows = rows
+        # the index, if any, is a column of the normalized rows already
+        self._table = _sampled_columns(
+            rows,
+            headers,
+            tablefmt,
+            floatfmt=floatfmt,
+            intfmt=intfmt,
+            numalign=numalign,
+            stralign=stralign,
+            missingval=missingval,
+            showindex="never",
+            disable_numparse=disable_numparse,
+            colalign=colalign,
+            coltypes=coltypes,
+        )
+
+    def __len__(self):
+        """The number of rows, separating lines included."""
+        return len(self.rows)
+
+    def page(self, offset=0, limit=None):
+        """Render `limit` rows (all the rest if None) from `offset` on."""
+        output = "\n".join(self.iter_page(offset, limit))
+        if self._table.fmt.lineabove == _html_begin_table_without_header:
+            return JupyterHTMLStr(output)
+        else:
+            return output
+
+    def iter_page(self, offset=0, limit=None):
+        """Yield the lines of a page one by one, see `page`."""
+        stop = None if limit is None else offset + limit
+        return _iter_fixed_width_table(self._table, self.rows[offset:stop])
+
+
+class IncrementalTable:
+    """Render a table, then render again only the rows which change.
+
+    The options are those of `tabulate`. The table is laid out like a
+    PagedTable and the lines of every row are kept. `update` replaces some
+    rows and renders only their lines, in the columns the table has. If a
+    new value doesn't fit them (it is wider than its column, or of a more
+    generic type, or has more decimals than the column aligns, or has line
+    breaks in a table which isn't multiline), the whole table is laid out
+    and rendered again. The columns don't get narrower when their widest
+    values are replaced, until `refresh` lays out the table again. The
+    table is always rendered with the settings (see `local_settings`) of
+    the thread which created it.
+
+    >>> table = IncrementalTable([["spam", 41.9999], ["eggs", 451.0]],
+    ...                          ["item", "qty"], "grid")
+    >>> table.update({1: ["ham", 1.5]})
+    True
+    >>> print(table)
+    +--------+----------+
+    | item   |      qty |
+    +========+==========+
+    | spam   |  41.9999 |
+    +--------+----------+
+    | ham    |   1.5    |
+    +--------+----------+
+    >>> table.update({0: ["spam and eggs", 2]})
+    False
+    >>> print(table)
+    +---------------+-------+
+    | item          |   qty |
+    +===============+=======+
+    | spam and eggs |   2   |
+    +---------------+-------+
+    | ham           |   1.5 |
+    +---------------+-------+
+
+    Rows rendered again look the same as in `tabulate` also with cells which
+    wcwidth can't measure, such as a line break in a format which isn't
+    multiline:
+
+    >>> with local_settings(wide_chars_mode=True):
+    ...     table = IncrementalTable([[2.0, "x\\ny"], [3.0, "c\\nd"]],
+    ...                              tablefmt="github")
+    ...     table.update({0: [2.0, "a\\nb"]})
+    ...     str(table) == tabulate([[2.0, "a\\nb"], [3.0, "c\\nd"]],
+    ...                            tablefmt="github")
+    True
+    True
+
+    """
+
+    def __init__(
+        self,
+        tabular_data,
+        headers=(),
+        tablefmt="simple",
+        floatfmt=_DEFAULT_FLOATFMT,
+        intfmt=_DEFAULT_INTFMT,
+        numalign=_DEFAULT_ALIGN,
+        stralign=_DEFAULT_ALIGN,
+        missingval=_DEFAULT_MISSINGVAL,
+        disable_numparse=False,
+        colalign=None,
+        coltypes=None,
+    ):
+        if tabular_data is None:
+            tabular_data = []
+        self.rows, self.headers = _normalize_tabular_data(
+            tabular_data, headers, showindex="never"
+        )
+        self.tablefmt = tablefmt
+        self.options = dict(
+            floatfmt=floatfmt,
+            intfmt=intfmt,
+            numalign=numalign,
+            stralign=stralign,
+            missingval=missingval,
+            disable_numparse=disable_numparse,
+            colalign=colalign,
+            coltypes=coltypes,
+        )
+        self.settings = current_settings()
+        self.refresh()
+
+    def __len__(self):
+        """The number of rows, separating lines included."""
+        return len(self.rows)
+
+    def __str__(self):
+        return "\n".join(self.lines())
+
+    def lines(self):
+        """The lines of the table."""
+        plan = self._plan
+        if not self.rows and not self.headers:
+            return []  # a completely empty table
+        lines = []
+        if plan.lineabove is not None:
+            lines.append(plan.lineabove)
+        lines.extend(self._header_lines)
+        for i, row_lines in enumerate(self._row_lines):
+            if i and plan.linebetweenrows is not None:
+                lines.append(plan.linebetweenrows)
+            lines.extend(row_lines)
+        if plan.linebelow is not None:
+            lines.append(plan.linebelow)
+        return lines
+
+    def refresh(self):
+        """Lay out and render the whole table again."""
+        options = self.options
+        with local_settings(*self.settings):
+            layout = _layout_table(
+                self.rows, self.headers, self.tablefmt, showindex="never",
+                **options
+            )
+            table = _layout_columns(
+                layout,
+                self.tablefmt,
+                options["floatfmt"],
+                options["intfmt"],
+                options["numalign"],
+                options["stralign"],
+                options["missingval"],
+                options["disable_numparse"],
+            )
+        plan = _make_fixed_width_plan(table)
+        self._header_lines = []
+        if table.headers:
+            self._header_lines = _fixed_width_row_lines(
+                table, plan, table.headers, table.is_multiline, plan.headerrow
+            )
+            if plan.linebelowheader is not None:
+                self._header_lines.append(plan.linebelowheader)
+        # the rows of the layout are aligned in the columns already
+        self._row_lines = [
+            _separating_row_lines(table, plan, list(row))
+            if _is_separating_line(row)
+            else _fixed_width_row_lines(
+                table, plan, row, table.is_multiline, plan.datarow)
+            for row in layout.rows
+        ]
+        self._table = table
+        self._plan = plan
+
+    def update(self, changes):
+        """Replace rows and render them again.
+
+        `changes` maps the numbers of the rows to replace to the new rows,
+        which are lists or tuples of cells (or SEPARATING_LINE). Return True
+        if only the new rows were rendered, False if the whole table was.
+        """
+        changes = [(i, list(row)) for i, row in dict(changes).items()]
+        for i, _ in changes:
+            self.rows[i]  # an IndexError before anything is replaced
+        for i, row in changes:
+            self.rows[i] = row
+        table, plan = self._table, self._plan
+        rendered = []
+        for i, row in changes:
+            if _is_separating_line(row):
+                rendered.append((i, _separating_row_lines(table, plan, row)))
+                continue
+            cells, is_multiline = _format_fixed_width_row(table, row)
+            if not _fits_fixed_width_columns(table, row, cells, is_multiline):
+                self.refresh()
+                return False
+            rendered.append(
+                (i, _fixed_width_row_lines(table, plan, cells, is_multiline, plan.datarow))
+            )
+        for i, row_lines in rendered:
+            self._row_lines[i] = row_lines
+        return True
+
+
+def tabulate_live(
+    rows,
+    headers=(),
+    tablefmt="simple",
+    colwidths=None,
+    sample=100,
+    floatfmt=_DEFAULT_FLOATFMT,
+    intfmt=_DEFAULT_INTFMT,
+    numalign=_DEFAULT_ALIGN,
+    stralign=_DEFAULT_ALIGN,
+    missingval=_DEFAULT_MISSINGVAL,
+    disable_numparse=False,
+    colalign=None,
+    coltypes=None,
+):
+    """Render rows as they arrive, in columns of fixed width.
+
+    Yields the lines of the table; the lines of every row are yielded as
+    soon as the row is taken from `rows`, which may be an endless iterator.
+    `rows` are lists or tuples, `headers` is a list of column names, the
+    other options are those of `tabulate`. All the rows are rendered with
+    the settings (see `local_settings`) in force when this is called.
+
+    The column widths (not counting the padding) are either given by the
+    caller as `colwidths`, or derived from the first `sample` rows. In the
+    latter case the column types and alignments are those of the sample,
+    and the sampled rows look exactly the same as in `tabulate`:
+
+    >>> feed = iter([["spam", 41.9999], ["eggs", 451.0], ["ham", 1.5]])
+    >>> for line in tabulate_live(feed, ["item", "qty"], sample=2):
+    ...     print(line)
+    item         qty
+    ------  --------
+    spam     41.9999
+    eggs    451
+    ham       1.5
+
+    Also with wide-character mode on, when wcwidth measures a cell with a
+    line break in a format which isn't multiline as -1 wide:
+
+    >>> rows = [[2.0, "a\\nb"], [3.0, "c\\nd"]]
+    >>> with local_settings(wide_chars_mode=True):
+    ...     lines = list(tabulate_live(iter(rows), tablefmt="github", sample=1))
+    ...     "\\n".join(lines) == tabulate(rows, tablefmt="github")
+    True
+
+    With `colwidths` the column types are those of `coltypes`, or those
+    of every single value. A column is at least as wide as its header.
+    Values which don't fit are not cut, they push the rest of their row
+    to the right. Rows are padded with missing values or cut to the number
+    of columns.
+
+    >>> for line in tabulate_live([["spam", 1], ["eggs", 22]], ["item", "qty"],
+    ...                           "grid", colwidths=[6, 4], coltypes=[str, int]):
+    ...     print(line)
+    +--------+-------+
+    | item   |   qty |
+    +========+=======+
+    | spam   |     1 |
+    +--------+-------+
+    | eggs   |    22 |
+    +--------+-------+
+
+    """
+    rows = iter(rows)
+    headers = list(map(str, headers))
+    options = dict(
+        floatfmt=floatfmt,
+        intfmt=intfmt,
+        numalign=numalign,
+        stralign=stralign,
+        missingval=missingval,
+        disable_numparse=disable_numparse,
+        colalign=colalign,
+        coltypes=coltypes,
+    )
+    if colwidths is None:
+        if not sample:
+            raise ValueError("either colwidths or a sample of rows is needed")
+        sample_rows = [list(row) for row in islice(rows, sample)]
+        table = _sampled_columns(sample_rows, headers, tablefmt, **options)
+        rows = chain(sample_rows, rows)
+    else:
+        table = _given_columns(colwidths, headers, tablefmt, **options)
+    return _iter_fixed_width_table(table, rows)
+
+
+def _sampled_columns(
+    rows,
+    headers,
+    tablefmt,
+    floatfmt=_DEFAULT_FLOATFMT,
+    intfmt=_DEFAULT_INTFMT,
+    numalign=_DEFAULT_ALIGN,
+    stralign=_DEFAULT_ALIGN,
+    missingval=_DEFAULT_MISSINGVAL,
+    showindex="default",
+    disable_numparse=False,
+    colalign=None,
+    coltypes=None,
+):
+    """Lay out `rows` like `tabulate` does; return _FixedWidthColumns.
+
+    The column widths, types and alignments are those of `rows`, which
+    look exactly the same when they are rendered in these columns.
+    """
+    layout = _layout_table(
+        rows,
+        headers,
+        tablefmt,
+        floatfmt=floatfmt,
+        intfmt=intfmt,
+        numalign=numalign,
+        stralign=stralign,
+        missingval=missingval,
+        showindex=showindex,
+        disable_numparse=disable_numparse,
+        colalign=colalign,
+        coltypes=coltypes,
+    )
+    return _layout_columns(
+        layout, tablefmt, floatfmt, intfmt, numalign, stralign, missingval,
+        disable_numparse,
+    )
+
+
+def _layout_columns(
+    layout, tablefmt, floatfmt, intfmt, numalign, stralign, missingval,
+    disable_numparse,
+):
+    """The _FixedWidthColumns of a _TableLayout.
+
+    The arguments are those with which _layout_table laid out the table.
+    """
+    ncols = len(layout.colwidths)
+    if tablefmt == "pretty":
+        disable_numparse = True
+    numalign, stralign = _default_aligns(tablefmt, numalign, stralign)
+    # wcwidth measures a string with control characters (e.g. a line break
+    # in a format which isn't multiline) as -1 wide, so a column of such
+    # strings can be narrower than nothing; _layout_column aligns the
+    # values of a column without headers in at least 0, and so do these
+    if layout.headers:
+        align_widths = layout.colwidths
+    else:
+        align_widths = [max(w, 0) for w in layout.colwidths]
+    columns = zip(
+        _expand_iterable(layout.coltypes, ncols, None),
+        _expand_numparse(disable_numparse, ncols),
+        _per_column(floatfmt, ncols, _DEFAULT_FLOATFMT),
+        _per_column(intfmt, ncols, _DEFAULT_INTFMT),
+        _per_column(missingval, ncols, _DEFAULT_MISSINGVAL),
+        _expand_iterable(layout.colaligns, ncols, None),
+        align_widths,
+        _expand_iterable(layout.maxdecimals, ncols, None),
+    )
+    return _FixedWidthColumns(
+        layout.fmt,
+        layout.headers,
+        layout.colwidths,
+        layout.colaligns,
+        list(columns),
+        layout.is_multiline,
+        not isinstance(tablefmt, TableFormat) and tablefmt in multiline_formats,
+        numalign,
+        stralign,
+        tablefmt == "rst",
+        current_settings(),
+    )
+
+
+def _given_columns(
+    colwidths,
+    headers,
+    tablefmt,
+    floatfmt=_DEFAULT_FLOATFMT,
+    intfmt=_DEFAULT_INTFMT,
+    numalign=_DEFAULT_ALIGN,
+    stralign=_DEFAULT_ALIGN,
+    missingval=_DEFAULT_MISSINGVAL,
+    disable_numparse=False,
+    colalign=None,
+    coltypes=None,
+):
+    """Return _FixedWidthColumns of the given widths, widened to fit headers.
+
+    The column types and alignments are taken from `coltypes` and
+    `colalign` where they are given, and from every single value otherwise.
+    """
+    settings = current_settings()
+    min_padding = settings.min_padding
+    if tablefmt == "pretty":
+        min_padding = 0
+        disable_numparse = True
+    numalign, stralign = _default_aligns(tablefmt, numalign, stralign)
+
+    if isinstance(tablefmt, TableFormat):
+        fmt = tablefmt
+        multiline_ok = False
+    else:
+        fmt = _table_formats.get(tablefmt, _table_formats["simple"])
+        multiline_ok = tablefmt in multiline_formats
+
+    ncols = len(colwidths)
+    coltypes = _expand_iterable(
+        None if coltypes is None else list(coltypes)[:ncols], ncols, None
+    )
+    for ct in coltypes:
+        if ct is not None and ct not in _type_genericity:
+            raise ValueError("unsupported column type: {!r}".format(ct))
+    if colalign is not None:
+        aligns = _expand_iterable(list(colalign)[:ncols], ncols, None)
+    else:
+        aligns = [
+            None if ct is None else numalign if ct in [int, float] else stralign
+            for ct in coltypes
+        ]
+
+    if tablefmt == "rst" and headers:
+        headers = _rst_escape_first_column([], headers)[1]
+    headers = headers[:ncols] + [""] * (ncols - len(headers)) if headers else []
+    is_multiline = multiline_ok and _find_invisible_and_multiline(headers)[1]
+    if headers:
+        width_fns = [
+            _choose_width_fn(
+                _find_invisible_and_multiline([h])[0],
+                settings.wide_chars_mode,
+                is_multiline,
+            )
+            for h in headers
+        ]
+        colwidths = [
+            max(w, w_fn(h) + min_padding)
+            for w, w_fn, h in zip(colwidths, width_fns, headers)
+        ]
+        headers = [
+            _align_header(h, a or stralign, w, w_fn(h), is_multiline, w_fn)
+            for h, a, w, w_fn in zip(headers, aligns, colwidths, width_fns)
+        ]
+
+    columns = zip(
+        coltypes,
+        _expand_numparse(disable_numparse, ncols),
+        _per_column(floatfmt, ncols, _DEFAULT_FLOATFMT),
+        _per_column(intfmt, ncols, _DEFAULT_INTFMT),
+        _per_column(missingval, ncols, _DEFAULT_MISSINGVAL),
+        aligns,
+        colwidths,
+        [None] * ncols,
+    )
+    return _FixedWidthColumns(
+        fmt,
+        headers,
+        list(colwidths),
+        [a or stralign for a in aligns],
+        list(columns),
+        is_multiline,
+        multiline_ok,
+        numalign,
+        stralign,
+        tablefmt == "rst",
+        settings,
+    )
+
+
+def _default_aligns(tablefmt, numalign, stralign):
+    "Replace the default numalign and stralign with those of the format."
+    if tablefmt == "pretty":
+        numalign = "center" if numalign == _DEFAULT_ALIGN else numalign
+        stralign = "center" if stralign == _DEFAULT_ALIGN else stralign
+    else:
+        numalign = "decimal" if numalign == _DEFAULT_ALIGN else numalign
+        stralign = "left" if stralign == _DEFAULT_ALIGN else stralign
+    return numalign, stralign
+
+
+def _with_table_settings(fn):
+    """Make fn(table, ...) run with the settings of _FixedWidthColumns.
+
+    The rows of a table are rendered with the settings it was laid out
+    with, not those of the thread (or the time) they are rendered in.
+    """
+
+    @wraps(fn)
+    def with_settings(table, *args):
+        token = _local_settings.set(_local_settings.get() + (table.settings,))
+        try:
+            return fn(table, *args)
+        finally:
+            _local_settings.reset(token)
+
+    return with_settings
+
+
+@_with_table_settings
+def _format_fixed_width_row(table, row):
+    """Format and align a row in _FixedWidthColumns.
+
+    Return the aligned cells and whether the row is to be rendered as a
+    multiline one: either the whole table is multiline (because of its
+    sample or headers), or the row has multiline values.
+    """
+    values = list(islice(chain(row, repeat(None)), len(table.columns)))
+    is_multiline = table.is_multiline or (
+        table.multiline_ok and _find_invisible_and_multiline(values)[1]
+    )
+    enable_widechars = table.settings.wide_chars_mode
+    cells = []
+    for val, (ct, numparse, fl_fmt, int_fmt, miss_v, a, w, maxdecs) in zip(
+        values, table.columns
+    ):
+        has_invisible, _ = _find_invisible_and_multiline([val], False)
+        # values which don't convert to the type of their column are
+        # formatted according to their own type
+        valtype = _parse_value(val, has_invisible, numparse)[0]
+        if ct is not None and _type_genericity[ct] > _type_genericity[valtype]:
+            valtype = ct
+        if a is None:
+            a = table.numalign if valtype in [int, float] else table.stralign
+        if table.escape_first and not cells:
+            val = _rst_escape_first_column([[val]], [])[0][0][0]
+        cell = _format(val, valtype, fl_fmt, int_fmt, miss_v, has_invisible)
+        wide = enable_widechars and not _is_printable_ascii(cell)
+        cells.extend(
+            _align_column(
+                [cell], a, w, has_invisible, wide, is_multiline, None, maxdecs
+            )
+        )
+    return cells, is_multiline
+
+
+@_with_table_settings
+def _fits_fixed_width_columns(table, row, cells, is_multiline):
+    """Whether a row looks the same in _FixedWidthColumns as in a table
+    laid out anew with the row in it.
+
+    `cells` and `is_multiline` are those of _format_fixed_width_row. The
+    row mustn't have more values than there are columns, nor values of a
+    more generic type than their column, nor cells wider than their column
+    or with more decimals than a "decimal" aligned column has, nor line
+    breaks if the table isn't multiline.
+    """
+    if len(row) > len(table.columns) or (is_multiline and not table.is_multiline):
+        return False
+    values = chain(row, repeat(None))
+    enable_widechars = table.settings.wide_chars_mode
+    for val, cell, (ct, numparse, _, _, _, a, w, maxdecs) in zip(
+        values, cells, table.columns
+    ):
+        has_invisible, _ = _find_invisible_and_multiline([val], False)
+        valtype = _parse_value(val, has_invisible, numparse)[0]
+        if ct is not None and _type_genericity[valtype] > _type_genericity[ct]:
+            return False
+        width_fn = _choose_width_fn(has_invisible, enable_widechars, is_multiline)
+        if width_fn(cell) > w:
+            return False
+        if a == "decimal" and maxdecs is not None:
+            text = _strip_ansi(cell) if has_invisible else cell
+            if _afterpoint(text.strip()) > maxdecs:
+                return False
+    return True
+
+
+@_with_table_settings
+def _format_fixed_width_chunk(table, rows):
+    """Format and align rows in _FixedWidthColumns column by column.
+
+    Return what _format_fixed_width_row would for every row, provided that
+    no value is of a more generic type than its column, that no value is
+    wider than its column, and that there are no multiline rows in a table
+    which isn't multiline (as with _scan_records). Columns without a type
+    are formatted row by row.
+    """
+    if not rows or any(ct is None for ct, *_ in table.columns):
+        return [_format_fixed_width_row(table, row) for row in rows]
+    ncols = len(table.columns)
+    cols = zip(*[islice(chain(row, repeat(None)), ncols) for row in rows])
+    enable_widechars = table.settings.wide_chars_mode
+    aligned_cols = []
+    for values, (ct, _, fl_fmt, int_fmt, miss_v, a, w, maxdecs) in zip(
+        cols, table.columns
+    ):
+        if table.escape_first and not aligned_cols:
+            values = _rst_escape_first_column([values], [])[0][0]
+        has_invisible, _ = _find_invisible_and_multiline(values, False)
+        if a is None:
+            a = table.numalign if ct in [int, float] else table.stralign
+        strings, decimals = _format_column(
+            values, ct, None, fl_fmt, int_fmt, miss_v, has_invisible, a == "decimal"
+        )
+        wide = enable_widechars and not _all_printable_ascii(strings)
+        aligned_cols.append(
+            _align_column(
+                strings, a, w, has_invisible, wide, table.is_multiline,
+                decimals, maxdecs,
+            )
+        )
+    return [(list(cells), table.is_multiline) for cells in zip(*aligned_cols)]
+
+
+def _iter_fixed_width_table(table, rows, chunk_size=None):
+    """Yield the lines of a table of _FixedWidthColumns row by row.
+
+    The lines of every row are yielded as soon as the row is taken from
+    `rows`. Nothing is yielded for a completely empty table. With a
+    `chunk_size`, rows are taken and formatted that many at a time, see
+    _format_fixed_width_chunk.
+    """
+    plan = _make_fixed_width_plan(table)
+
+    def iter_header_lines():
+        if plan.lineabove is not None:
+            yield plan.lineabove
+        if table.headers:
+            yield from _fixed_width_row_lines(
+                table, plan, table.headers, table.is_multiline, plan.headerrow
+            )
+            if plan.linebelowheader is not None:
+                yield plan.linebelowheader
+
+    def iter_formatted_rows():
+        # (row, cells, is_multiline) for every row, cells are None
+        # for a separating line
+        if chunk_size is None:
+            for row in rows:
+                row = list(row)
+                if _is_separating_line(row):
+                    yield row, None, False
+                else:
+                    yield (row, *_format_fixed_width_row(table, row))
+            return
+        row_iter = iter(rows)
+        chunk = list(map(list, islice(row_iter, chunk_size)))
+        while chunk:
+            formatted = iter(
+                _format_fixed_width_chunk(
+                    table, [row for row in chunk if not _is_separating_line(row)]
+                )
+            )
+            for row in chunk:
+                if _is_separating_line(row):
+                    yield row, None, False
+                else:
+                    yield (row, *next(formatted))
+            chunk = list(map(list, islice(row_iter, chunk_size)))
+
+    has_rows = False
+    for row, cells, is_multiline in iter_formatted_rows():
+        if not has_rows:
+            yield from iter_header_lines()
+            has_rows = True
+        elif plan.linebetweenrows is not None:
+            yield plan.linebetweenrows
+        if cells is None:
+            yield from _separating_row_lines(table, plan, row)
+        else:
+            yield from _fixed_width_row_lines(
+                table, plan, cells, is_multiline, plan.datarow)
+    if not has_rows:
+        if not table.headers:
+            return  # a completely empty table
+        yield from iter_header_lines()
+    if plan.linebelow is not None:
+        yield plan.linebelow
+
+
+def _make_fixed_width_plan(table):
+    "The _FormatPlan of a table of _FixedWidthColumns."
+    # lines don't depend on whether the table is multiline, rows do
+    return _make_format_plan(
+        table.fmt, bool(table.headers), table.colwidths, table.colaligns, False
+    )
+
+
+def _fixed_width_row_lines(table, plan, cells, is_multiline, rowfmt):
+    """The lines of a row of aligned cells in _FixedWidthColumns."""
+    if is_multiline:
+        return _append_multiline_row(
+            [], cells, plan.padded_widths, table.colaligns, rowfmt,
+            pad=table.fmt.padding,
+        )
+    else:
+        return _append_basic_row(
+            [], plan.pad_row(cells), plan.padded_widths, table.colaligns, rowfmt
+        )
+
+
+def _separating_row_lines(table, plan, row):
+    """The lines of a separating line in _FixedWidthColumns.
+
+    Like in _iter_format_table, a line is drawn only if the marker is still
+    there after padding and there are no lines between rows, otherwise the
+    marker is rendered as a cell.
+    """
+    if not table.is_multiline:
+        row = plan.pad_row(row)
+    if plan.linebetweenrows is None and _is_separating_line(row):
+        return [plan.separating_line]
+    elif table.is_multiline:
+        return _append_multiline_row(
+            [], row, plan.padded_widths, table.colaligns, plan.datarow,
+            pad=table.fmt.padding,
+        )
+    else:
+        return _append_basic_row(
+            [], row, plan.padded_widths, table.colaligns, plan.datarow)
+
+
+def _per_column(option, ncols, default):
+    """A format option of `tabulate` for each of `ncols` columns."""
+    if isinstance(option, str):
+        return [option] * ncols
+    option = list(option)[:ncols]
+    return option + [default] * (ncols - len(option))
+
+
+class _PhaseTimer:
+    """Add up the time spent in each phase of rendering a table.
+
+    If `tracemalloc` is tracing, the most memory allocated during each
+    phase is recorded as well, as far as it can be told without resetting
+    the peak of tracemalloc. `callback` is the `stats` of `tabulate`.
+    """
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.seconds = {}
+        self.peaks = {}
+
+    def __reduce__(self):
+        # the timer of a worker process of _map_columns reports nothing
+        return (_PhaseTimer, (None,))
+
+    def start(self):
+        if self.callback is None:
+            return None
+        import tracemalloc
+
+        if tracemalloc.is_tracing():
+            memory = tracemalloc.get_traced_memory()
+        else:
+            memory = None
+        return time.perf_counter(), memory
+
+    def stop(self, phase, started):
+        if started is None:
+            return
+        start_time, start_memory = started
+        self.seconds[phase] = (
+            self.seconds.get(phase, 0.0) + time.perf_counter() - start_time
+        )
+        if start_memory is not None:
+            import tracemalloc
+
+            start_current, start_peak = start_memory
+            current, peak = tracemalloc.get_traced_memory()
+            if peak > start_peak:  # a new peak, reached during this phase
+                peak = peak - start_current
+            else:
+                peak = max(current - start_current, 0)
+            self.peaks[phase] = max(self.peaks.get(phase, 0), peak)
+
+    def report(self):
+        if self.callback is not None:
+            for phase, seconds in self.seconds.items():
+                self.callback(phase, seconds, self.peaks.get(phase))
+
+
+def _layout_table(
+    tabular_data,
+    headers=(),
+    tablefmt="simple",
+    floatfmt=_DEFAULT_FLOATFMT,
+    intfmt=_DEFAULT_INTFMT,
+    numalign=_DEFAULT_ALIGN,
+    stralign=_DEFAULT_ALIGN,
+    missingval=_DEFAULT_MISSINGVAL,
+    showindex="default",
+    disable_numparse=False,
+    colalign=None,
+    maxcolwidths=None,
+    rowalign=None,
+    maxheadercolwidths=None,
+    coltypes=None,
+    headtail=None,
+    headtailwidths="shown",
+    timer=None,
+):
+    """Normalize, format and align the data; return a _TableLayout.
+
+    The arguments are those of `tabulate`; the phases are timed by `timer`,
+    a _PhaseTimer. The rows of the returned layout are an iterator and can
+    be consumed only once.
+    """
+    if timer is None:
+        timer = _PhaseTimer(None)
+    if tabular_data is None:
+        tabular_data = []
+
+    if headtail is not None:
+        layout_rows = partial(
+            _layout_table,
+            tablefmt=tablefmt,
+            floatfmt=floatfmt,
+            intfmt=intfmt,
+            numalign=numalign,
+            stralign=stralign,
+            missingval=missingval,
+            disable_numparse=disable_numparse,
+            colalign=colalign,
+            maxcolwidths=maxcolwidths,
+            maxheadercolwidths=maxheadercolwidths,
+            coltypes=coltypes,
+            timer=timer,
+        )
+        return _layout_head_tail(
+            layout_rows,
+            tabular_data,
+            headers,
+            showindex,
+            rowalign,
+            headtail,
+            headtailwidths,
+            timer,
+        )
+
+    started = timer.start()
+
+    # numeric NumPy arrays and dicts of columns are split into columns
+    # without going through a list of rows, see _normalize_numpy_columns
+    # and _normalize_columns
+    columnar_table = None
+    if maxcolwidths is None:
+        columnar_table = _normalize_numpy_columns(
+            tabular_data, headers, showindex
+        ) or _normalize_columns(tabular_data, headers, showindex)
+
+    if columnar_table is not None:
+        cols, headers = columnar_table
+        separating_lines = None
+        timer.stop("normalize", started)
+    else:
+        list_of_lists, headers = _normalize_tabular_data(
+            tabular_data, headers, showindex=showindex
+        )
+        timer.stop("normalize", started)
+        started = timer.start()
+        list_of_lists, separating_lines = _remove_separating_lines(
+            list_of_lists)
+        timer.stop("separating_lines", started)
+
+        if maxcolwidths is not None:
+            started = timer.start()
+            num_cols = len(list_of_lists[0])
+            if isinstance(maxcolwidths, int):  # Expand scalar for all columns
+                maxcolwidths = _expand_iterable(
+                    maxcolwidths, num_cols, maxcolwidths)
+            else:  # Ignore col width for any 'trailing' columns
+                maxcolwidths = _expand_iterable(maxcolwidths, num_cols, None)
+
+            numparses = _expand_numparse(disable_numparse, num_cols)
+            list_of_lists = _wrap_text_to_colwidths(
+                list_of_lists, maxcolwidths, numparses=numparses
+            )
+            timer.stop("wrap", started)
+
+        cols = list(izip_longest(*list_of_lists))
+
+    if maxheadercolwidths is not None:
+        started = timer.start()
+        num_cols = len(cols) if columnar_table else len(list_of_lists[0])
+        if isinstance(maxheadercolwidths, int):  # Expand scalar for all columns
+            maxheadercolwidths = _expand_iterable(
+                maxheadercolwidths, num_cols, maxheadercolwidths
+            )
+        else:  # Ignore col width for any 'trailing' columns
+            maxheadercolwidths = _expand_iterable(
+                maxheadercolwidths, num_cols, None)
+
+        numparses = _expand_numparse(disable_numparse, num_cols)
+        headers = _wrap_text_to_colwidths(
+            [headers], maxheadercolwidths, numparses=numparses
+        )[0]
+        timer.stop("wrap", started)
+
+    # empty values in the first column of RST tables should be escaped (issue #82)
+    # "" should be escaped as "\\ " or ".."
+    if tablefmt == "rst":
+        cols, headers = _rst_escape_first_column(cols, headers)
+
+    # PrettyTable formatting does not use any extra padding.
+    # Numbers are not parsed and are treated the same as strings for alignment.
+    # Check if pretty is the format being used and override the defaults so it
+    # does not impact other formats.
+    min_padding = current_settings().min_padding
+    if tablefmt == "pretty":
+        min_padding = 0
+        disable_numparse = True
+        numalign = "center" if numalign == _DEFAULT_ALIGN else numalign
+        stralign = "center" if stralign == _DEFAULT_ALIGN else stralign
+    else:
+        numalign = "decimal" if numalign == _DEFAULT_ALIGN else numalign
+        stralign = "left" if stralign == _DEFAULT_ALIGN else stralign
+
+    # optimization: look for ANSI control codes column by column,
+    # enable smart width functions only for the columns where one is found
+    started = timer.start()
+    ncols = max(len(cols), len(headers))
+    col_headers = list(headers) + [""] * (ncols - len(headers))
+    col_values = list(cols) + [()] * (ncols - len(cols))
+    col_invisibles = []
+    is_multiline = False
+    for header, col in zip(col_headers, col_values):
+        if _is_numeric_array(col):  # arrays of numbers can't contain any codes
+            col = ()
+        has_invisible, has_multiline = _find_invisible_and_multiline(
+            chain([header], col), find_multiline=not is_multiline
+        )
+        col_invisibles.append(has_invisible)
+        is_multiline = is_multiline or has_multiline
+    timer.stop("scan", started)
+
+    enable_widechars = current_settings().wide_chars_mode
+    if (
+        not isinstance(tablefmt, TableFormat)
+        and tablefmt in multiline_formats
+        and is_multiline
+    ):
+        tablefmt = multiline_formats.get(tablefmt, tablefmt)
+    else:
+        is_multiline = False
 
-    # align columns
-    aligns = [numalign if ct in [int, float] else stralign for ct in coltypes]
+    # format rows and columns, convert numeric values to strings
+    numparses = _expand_numparse(disable_numparse, len(cols))
+    if coltypes is None:
+        coltypes = []
+    else:
+        coltypes = list(coltypes)
+        for ct in coltypes:
+            if ct is not None and ct not in _type_genericity:
+                raise ValueError(
+                    "unsupported column type: {!r}".format(ct))
+    coltypes = _expand_iterable(coltypes, len(cols), None)
+    for column, (values, ct, has_invisible) in enumerate(
+        zip(cols, coltypes, col_invisibles)
+    ):
+        _check_column_type(column, values, ct, has_invisible)
+    if isinstance(floatfmt, str):  # old version
+        float_formats = len(cols) * [
+            floatfmt
+        ]  # just duplicate the string to use in each column
+    else:  # if floatfmt is list, tuple etc we have one per column
+        float_formats = list(floatfmt)
+        if len(float_formats) < len(cols):
+            float_formats.extend(
+                (len(cols) - len(float_formats)) * [_DEFAULT_FLOATFMT])
+    if isinstance(intfmt, str):  # old version
+        int_formats = len(cols) * [
+            intfmt
+        ]  # just duplicate the string to use in each column
+    else:  # if intfmt is list, tuple etc we have one per column
+        int_formats = list(intfmt)
+        if len(int_formats) < len(cols):
+            int_formats.extend((len(cols) - len(int_formats))
+                               * [_DEFAULT_INTFMT])
+    if isinstance(missingval, str):
+        missing_vals = len(cols) * [missingval]
+    else:
+        missing_vals = list(missingval)
+        if len(missing_vals) < len(cols):
+            missing_vals.extend(
+                (len(cols) - len(missing_vals)) * [_DEFAULT_MISSINGVAL])
+    # a column aligned by the caller has the same alignment whatever its type
+    numaligns = [numalign] * len(cols)
+    straligns = [stralign] * len(cols)
     if colalign is not None:
         assert isinstance(colalign, Iterable)
         for idx, align in enumerate(colalign):
-            aligns[idx] = align
-    minwidths = (
-        [width_fn(h) + min_padding for h in headers] if headers else [0] * len(cols)
+            numaligns[idx] = straligns[idx] = align
+
+    # parse, format and align every column
+    started = timer.start()
+    laid_out_cols = _map_columns(
+        _layout_column,
+        len(cols[0]) * len(cols) if cols else 0,
+        cols,
+        list(headers[: len(cols)]) + [None] * (len(cols) - len(headers)),
+        coltypes,
+        numparses,
+        float_formats,
+        int_formats,
+        missing_vals,
+        numaligns,
+        straligns,
+        col_invisibles,
+        [enable_widechars] * len(cols),
+        [is_multiline] * len(cols),
+        [min_padding] * len(cols),
+        [timer] * len(cols),
     )
-    cols = [
-        _align_column(c, a, minw, has_invisible,
-                      enable_widechars, is_multiline)
-        for c, a, minw in zip(cols, aligns, minwidths)
+    if cols and "align" not in timer.seconds:  # timed in other processes
+        timer.stop("columns", started)
+    started = timer.start()
+    cols = [c for c, _, _, _, _ in laid_out_cols]
+    if headers:
+        del cols[len(headers):]  # the rows are cut to the headers
+    coltypes = [ct for _, ct, _, _, _ in laid_out_cols]
+    aligns = [a for _, _, a, _, _ in laid_out_cols]
+    maxdecimals = [decs for _, _, _, decs, _ in laid_out_cols]
+    # headers may have more columns than the rows
+    col_widechars = [wide for _, _, _, _, wide in laid_out_cols] + [
+        enable_widechars and not _is_printable_ascii(h)
+        for h in col_headers[len(cols):]
     ]
+    col_width_fns = [
+        _choose_width_fn(inv, wide, is_multiline)
+        for inv, wide in zip(col_invisibles, col_widechars)
+    ]
+    minwidths = (
+        [w_fn(h) + min_padding for h, w_fn in zip(headers, col_width_fns)]
+        if headers
+        else [0] * len(cols)
+    )
 
     if headers:
         # align headers and add headers
         t_cols = cols or [[""]] * len(headers)
         t_aligns = aligns or [stralign] * len(headers)
         minwidths = [
-            max(minw, max(width_fn(cl) for cl in c))
-            for minw, c in zip(minwidths, t_cols)
+            max(minw, max(map(w_fn, c)))
+            for minw, c, w_fn in zip(minwidths, t_cols, col_width_fns)
         ]
         headers = [
-            _align_header(h, a, minw, width_fn(h), is_multiline, width_fn)
-            for h, a, minw in zip(headers, t_aligns, minwidths)
+            _align_header(h, a, minw, w_fn(h), is_multiline, w_fn)
+            for h, a, minw, w_fn in zip(headers, t_aligns, minwidths, col_width_fns)
         ]
-        rows = list(zip(*cols))
     else:
-        minwidths = [max(width_fn(cl) for cl in c) for c in cols]
-        rows = list(zip(*cols))
+        minwidths = [max(map(w_fn, c)) for c, w_fn in zip(cols, col_width_fns)]
+    timer.stop("headers", started)
+    # rows are produced lazily so that a streaming consumer never holds
+    # a second, row-major copy of the whole table
+    nrows = len(cols[0]) if cols else 0
+    rows = _iter_reinsert_separating_lines(zip(*cols), separating_lines)
 
     if not isinstance(tablefmt, TableFormat):
         tablefmt = _table_formats.get(tablefmt, _table_formats["simple"])
 
     ra_default = rowalign if isinstance(rowalign, str) else None
-    rowaligns = _expand_iterable(rowalign, len(rows), ra_default)
-    _reinsert_separating_lines(rows, separating_lines)
+    rowaligns = _expand_iterable(rowalign, nrows, ra_default)
+
+    return _TableLayout(
+        tablefmt,
+        headers,
+        rows,
+        minwidths,
+        aligns,
+        is_multiline,
+        rowaligns,
+        coltypes,
+        maxdecimals,
+    )
+
+
+# The text of the row in place of the rows left out by `headtail`.
+_ELLIPSIS = "..."
+
+
+def _layout_head_tail(
+    layout_rows, tabular_data, headers, showindex, rowalign, k, widths, timer
+):
+    """Lay out the first `k` and the last `k` rows with an ellipsis between.
+
+    `layout_rows(rows, headers, showindex=..., rowalign=...)` lays out the
+    rows with the other options of the table. The column widths and types
+    are found from the rows shown if `widths` is "shown", or from all of
+    them if it is "all".
+    """
+    if isinstance(k, bool) or not isinstance(k, int) or k < 1:
+        raise ValueError("headtail must be a positive integer: {!r}".format(k))
+    if widths not in ("shown", "all"):
+        raise ValueError(
+            'headtailwidths must be "shown" or "all": {!r}'.format(widths))
+
+    # the rows are normalized first, so that the index numbers the rows
+    # of all the data; only the rows shown are normalized if they can be
+    # picked from a list of rows beforehand
+    started = timer.start()
+    picked = None
+    if widths == "shown":
+        picked = _pick_head_tail(tabular_data, headers, showindex, k)
+    if picked is not None:
+        rows, showindex, nrows = picked
+        rows, headers = _normalize_tabular_data(rows, headers, showindex=showindex)
+        timer.stop("normalize", started)
+    else:
+        rows, headers = _normalize_tabular_data(
+            tabular_data, headers, showindex=showindex)
+        timer.stop("normalize", started)
+        nrows = len(rows)
+        if nrows <= 2 * k:
+            return layout_rows(rows, headers, showindex="never", rowalign=rowalign)
+        if widths == "shown":
+            rows = rows[:k] + rows[nrows - k:]
+
+    if widths == "shown":
+        if isinstance(rowalign, Iterable) and not isinstance(rowalign, str):
+            rowalign = _expand_iterable(rowalign, nrows, None)
+            rowalign = rowalign[:k] + rowalign[nrows - k:]
+        layout = layout_rows(rows, headers, showindex="never", rowalign=rowalign)
+        shown_rows = iter(layout.rows)
+        head = list(islice(shown_rows, k))
+        tail = list(shown_rows)
+    else:
+        layout = layout_rows(rows, headers, showindex="never", rowalign=rowalign)
+        all_rows = iter(layout.rows)
+        head = list(islice(all_rows, k))
+        tail = list(deque(all_rows, maxlen=k))
+
+    colwidths = layout.colwidths
+    colaligns = _expand_iterable(list(layout.colaligns), len(colwidths), "left")
+    headers = layout.headers
+    # the columns too narrow for the ellipsis are widened, their cells are
+    # aligned already
+    narrow = [i for i, w in enumerate(colwidths) if w < len(_ELLIPSIS)]
+    if narrow:
+
+        def widen(cell, i):
+            extra = len(_ELLIPSIS) - colwidths[i]
+            left = {"right": extra, "decimal": extra, "center": extra // 2}
+            before = " " * left.get(colaligns[i], 0)
+            after = " " * (extra - len(before))
+            return "\n".join(before + line + after for line in cell.split("\n"))
+
+        def widen_row(row):
+            if _is_separating_line(row):
+                return row
+            row = list(row)
+            for i in narrow:
+                if i < len(row):
+                    row[i] = widen(row[i], i)
+            return row
+
+        head = list(map(widen_row, head))
+        tail = list(map(widen_row, tail))
+        if headers:
+            headers = widen_row(headers)
+        colwidths = [max(w, len(_ELLIPSIS)) for w in colwidths]
+
+    padfns = {"right": _padleft, "decimal": _padleft, "center": _padboth}
+    ellipsis = [
+        padfns.get(align, _padright)(width, _ELLIPSIS)
+        for width, align in zip(colwidths, colaligns)
+    ]
+    rowaligns = layout.rowaligns
+    rowaligns = rowaligns[:k] + [None] + rowaligns[max(len(rowaligns) - k, k):]
+    return layout._replace(
+        headers=headers,
+        rows=chain(head, [ellipsis], tail),
+        colwidths=colwidths,
+        rowaligns=rowaligns,
+    )
+
+
+def _pick_head_tail(tabular_data, headers, showindex, k):
+    """Pick the first `k` and the last `k` rows from a list of rows.
+
+    Return the rows, the index to show with them (see `showindex`) and the
+    number of rows of all the data, or None if the rows can't be picked
+    before the data is normalized.
+    """
+    if type(tabular_data) not in (list, tuple):
+        return None
+    if isinstance(headers, str) and headers == "firstrow":
+        return None
+    nrows = len(tabular_data)
+    if nrows <= 2 * k:
+        return None
+    first = tabular_data[0]
+    if hasattr(first, "keys") and hasattr(first, "values"):
+        return None  # the headers are the keys of all the rows
+    positions = list(range(k)) + list(range(nrows - k, nrows))
+
+    showindex_is_a_str = type(showindex) in [str, bytes]
+    if isinstance(showindex, Sized) and not showindex_is_a_str:
+        if len(showindex) != nrows:
+            return None
+        index = list(showindex)
+        showindex = [index[i] for i in positions]
+    elif isinstance(showindex, Iterable) and not showindex_is_a_str:
+        return None
+    elif showindex == "always" or (_bool(showindex) and not showindex_is_a_str):
+        showindex = positions
+    if isinstance(showindex, list):  # separating lines have no index
+        if any(map(_is_separating_line, tabular_data)):
+            return None
+    return [tabular_data[i] for i in positions], showindex, nrows
+
+
+def _layout_column(
+    values,
+    header,
+    coltype,
+    numparse,
+    floatfmt,
+    intfmt,
+    missingval,
+    numalign,
+    stralign,
+    has_invisible,
+    enable_widechars,
+    is_multiline,
+    min_padding,
+    timer,
+):
+    """Parse, format and align the values of a column.
+
+    `coltype` is None if it is to be found from the values. `numalign` is
+    the alignment of a numeric column, `stralign` of any other one. The
+    column is at least `min_padding` wider than its `header`, unless the
+    header is None. The phases are timed by `timer`.
 
-    return _format_table(
-        tablefmt, headers, rows, minwidths, aligns, is_multiline, rowaligns=rowaligns
+    Returns the aligned strings, the column type, its alignment, the
+    maxdecimals (see _TableLayout) and whether wcwidth is needed to
+    measure the column.
+    """
+    distinct = _distinct_values(values)
+    if distinct is not None:
+        # every distinct value is parsed, formatted and aligned only once
+        # (and isn't encoded again, all of its values are distinct)
+        padded, *rest = _layout_column(
+            distinct,
+            header,
+            coltype,
+            numparse,
+            floatfmt,
+            intfmt,
+            missingval,
+            numalign,
+            stralign,
+            has_invisible,
+            enable_widechars,
+            is_multiline,
+            min_padding,
+            timer,
+        )
+        started = timer.start()
+        padded = dict(zip(distinct, padded))
+        padded = list(map(padded.__getitem__, values))
+        timer.stop("align", started)
+        return (padded, *rest)
+
+    started = timer.start()
+    if coltype is None:
+        coltype, numbers = _parse_column(values, numparse=numparse)
+    else:
+        numbers = None
+    timer.stop("types", started)
+    started = timer.start()
+    align = numalign if coltype in [int, float] else stralign
+    # the positions of decimal points are found while the values are formatted
+    strings, decimals = _format_column(
+        values,
+        coltype,
+        numbers,
+        floatfmt,
+        intfmt,
+        missingval,
+        has_invisible,
+        align == "decimal",
+    )
+    if decimals is None or not len(decimals):
+        maxdecimals = None
+    elif hasattr(decimals, "dtype"):
+        maxdecimals = int(decimals.max())
+    else:
+        maxdecimals = max(decimals)
+    timer.stop("format", started)
+
+    started = timer.start()
+    # wide-character support only for the columns which have other than
+    # printable ASCII characters; formatted numbers from NumPy arrays never do
+    enable_widechars = enable_widechars and (
+        (header is not None and not _is_printable_ascii(header))
+        or (not hasattr(strings, "dtype")
+            and not _all_printable_ascii(strings))
+    )
+    if header is None:
+        minwidth = 0
+    else:
+        width_fn = _choose_width_fn(has_invisible, enable_widechars, is_multiline)
+        minwidth = width_fn(header) + min_padding
+    strings = _align_column(
+        strings,
+        align,
+        minwidth,
+        has_invisible,
+        enable_widechars,
+        is_multiline,
+        decimals,
     )
+    timer.stop("align", started)
+    return strings, coltype, align, maxdecimals, enable_widechars
+
+
+# Values of these types are formatted the same way when they are equal
+# (unlike 0.0 and -0.0, or True and 1), so a column of them can be
+# formatted one distinct value at a time.
+_dictionary_types = {str, int, bytes, type(None)}
+
+# The most distinct values a column can have to be formatted one distinct
+# value at a time, see _distinct_values.
+_MAX_DISTINCT_VALUES = 1024
+
+
+def _distinct_values(values):
+    """The distinct values of a column with few of them, or None.
+
+    A column has few distinct values if every value is repeated twice on
+    average and there are at most _MAX_DISTINCT_VALUES of them.
+
+    >>> _distinct_values(["UK", "China", "UK", "UK", "China", None] * 20)
+    ['UK', 'China', None]
+
+    """
+    if hasattr(values, "dtype") or len(values) < 64:
+        return None
+    limit = min(len(values) // 2, _MAX_DISTINCT_VALUES)
+    # a glance at the first values rules out most other columns
+    head = values[: 4 * _MAX_DISTINCT_VALUES]
+    if not set(map(type, head)) <= _dictionary_types or len(set(head)) > limit:
+        return None
+    if not set(map(type, values)) <= _dictionary_types:
+        return None
+    distinct = dict.fromkeys(values)
+    if len(distinct) > limit:
+        return None
+    return list(distinct)
+
+
+# The pool of processes of _map_columns, started for the first big table and
+# kept for the next ones, and its number of processes.
+_process_pool = None
+_process_pool_workers = None
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool(workers):
+    "The pool of `workers` processes of _map_columns."
+    global _process_pool, _process_pool_workers
+    from concurrent.futures import ProcessPoolExecutor
+
+    with _process_pool_lock:
+        if _process_pool is None or _process_pool_workers != workers:
+            if _process_pool is not None:
+                _process_pool.shutdown(wait=False)
+            _process_pool = ProcessPoolExecutor(max_workers=workers)
+            _process_pool_workers = workers
+        return _process_pool
+
+
+def _drop_process_pool(pool):
+    "Shut down a broken pool of _map_columns, a new one is started next time."
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is pool:
+            _process_pool = None
+    pool.shutdown(wait=False)
+
+
+def _forget_process_pool_after_fork():
+    # the processes of the pool belong to the parent process
+    global _process_pool, _process_pool_lock
+    _process_pool = None
+    _process_pool_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_process_pool_after_fork)
+
+
+def _map_columns(fn, ncells, *iterables):
+    """map(fn, *iterables), in a pool of processes for a big table.
+
+    A table of `ncells` cells is big if it has at least PARALLEL_MIN_CELLS
+    of them. The pool has PARALLEL_WORKERS processes, or one per CPU, and
+    is kept for the next big table; it isn't used for a single column. The
+    settings of the caller (see `current_settings`) are sent along with
+    every column, so the result is the same either way. A table which
+    can't be pickled is laid out in this process, but errors of `fn` in
+    the pool are raised as they are.
+    """
+    ncols = min(map(len, iterables)) if iterables else 0
+    workers = PARALLEL_WORKERS or os.cpu_count() or 1
+    if (
+        PARALLEL_MIN_CELLS is None
+        or ncells < PARALLEL_MIN_CELLS
+        or min(ncols, workers) < 2
+    ):
+        return list(map(fn, *iterables))
+
+    from concurrent.futures.process import BrokenProcessPool
+    import pickle
+
+    settings = current_settings()
+    try:
+        calls = [
+            pickle.dumps((settings, fn, args), pickle.HIGHEST_PROTOCOL)
+            for args in zip(*iterables)
+        ]
+    except (pickle.PicklingError, AttributeError, TypeError):
+        # values which can't be sent to another process
+        return list(map(fn, *iterables))
+    pool = _get_process_pool(workers)
+    try:
+        return list(pool.map(_call_pickled, calls))
+    except BrokenProcessPool:
+        # a process died (e.g. it was killed for its memory): a new pool is
+        # started for the next table, this one is laid out here
+        _drop_process_pool(pool)
+        return list(map(fn, *iterables))
+
+
+def _call_pickled(call):
+    "Make a call pickled by _map_columns, in a process of its pool."
+    import pickle
+
+    settings, fn, args = pickle.loads(call)
+    with local_settings(*settings):
+        return fn(*args)
 
 
 def _expand_numparse(disable_numparse, column_count):
@@ -2258,6 +4981,19 @@ def _pad_row(cells, padding):
         return cells
 
 
+def _make_pad_row(padding):
+    """Return a function which pads every cell of a row like _pad_row."""
+    pad = " " * padding
+
+    def pad_row(cells):
+        if cells:
+            return [pad + cell + pad for cell in cells]
+        else:
+            return cells
+
+    return pad_row
+
+
 def _build_simple_row(padded_cells, rowfmt):
     "Format row according to DataRow format without padding."
     begin, sep, end = rowfmt
@@ -2345,75 +5081,140 @@ class JupyterHTMLStr(str):
         return self
 
 
-def _format_table(fmt, headers, rows, colwidths, colaligns, is_multiline, rowaligns):
+def _format_table(
+    fmt, headers, rows, colwidths, colaligns, is_multiline, rowaligns, plan=None
+):
     """Produce a plain-text representation of the table."""
-    lines = []
-    hidden = fmt.with_header_hide if (headers and fmt.with_header_hide) else []
+    lines = list(
+        _iter_format_table(
+            fmt, headers, rows, colwidths, colaligns, is_multiline, rowaligns, plan
+        )
+    )
+    if lines:
+        output = "\n".join(lines)
+        if fmt.lineabove == _html_begin_table_without_header:
+            return JupyterHTMLStr(output)
+        else:
+            return output
+    else:  # a completely empty table
+        return ""
+
+
+def _make_format_plan(fmt, has_headers, colwidths, colaligns, is_multiline):
+    """Precompute the parts of a table which don't depend on its cells."""
+    hidden = fmt.with_header_hide if (has_headers and fmt.with_header_hide) else []
     pad = fmt.padding
-    headerrow = fmt.headerrow
 
     padded_widths = [(w + 2 * pad) for w in colwidths]
     if is_multiline:
-        def pad_row(row, _): return row  # noqa do it later, in _append_multiline_row
+        def pad_row(row): return row  # noqa do it later, in _append_multiline_row
         append_row = partial(_append_multiline_row, pad=pad)
     else:
-        pad_row = _pad_row
+        pad_row = _make_pad_row(pad)
         append_row = _append_basic_row
 
-    padded_headers = pad_row(headers, pad)
-    padded_rows = [pad_row(row, pad) for row in rows]
+    def build_line(name):
+        linefmt = getattr(fmt, name)
+        if linefmt and name not in hidden:
+            return _build_line(padded_widths, colaligns, linefmt)
+        else:
+            return None
+
+    separating_line = (
+        fmt.linebetweenrows
+        or fmt.linebelowheader
+        or fmt.linebelow
+        or fmt.lineabove
+        or Line("", "", "", "")
+    )
+    return _FormatPlan(
+        padded_widths,
+        pad_row,
+        append_row,
+        _compile_row(fmt.headerrow, colaligns),
+        _compile_row(fmt.datarow, colaligns),
+        build_line("lineabove"),
+        build_line("linebelowheader"),
+        build_line("linebetweenrows"),
+        build_line("linebelow"),
+        _build_line(padded_widths, colaligns, separating_line),
+    )
 
-    if fmt.lineabove and "lineabove" not in hidden:
-        _append_line(lines, padded_widths, colaligns, fmt.lineabove)
 
-    if padded_headers:
-        append_row(lines, padded_headers, padded_widths, colaligns, headerrow)
-        if fmt.linebelowheader and "linebelowheader" not in hidden:
-            _append_line(lines, padded_widths, colaligns, fmt.linebelowheader)
-
-    if padded_rows and fmt.linebetweenrows and "linebetweenrows" not in hidden:
-        # initial rows with a line below
-        for row, ralign in zip(padded_rows[:-1], rowaligns):
-            append_row(
-                lines, row, padded_widths, colaligns, fmt.datarow, rowalign=ralign
-            )
-            _append_line(lines, padded_widths, colaligns, fmt.linebetweenrows)
-        # the last row without a line below
-        append_row(
-            lines,
-            padded_rows[-1],
-            padded_widths,
-            colaligns,
-            fmt.datarow,
-            rowalign=rowaligns[-1],
-        )
-    else:
-        separating_line = (
-            fmt.linebetweenrows
-            or fmt.linebelowheader
-            or fmt.linebelow
-            or fmt.lineabove
-            or Line("", "", "", "")
-        )
-        for row in padded_rows:
-            # test to see if either the 1st column or the 2nd column (account for showindex) has
-            # the SEPARATING_LINE flag
-            if _is_separating_line(row):
-                _append_line(lines, padded_widths, colaligns, separating_line)
-            else:
-                append_row(lines, row, padded_widths, colaligns, fmt.datarow)
+def _iter_format_table(
+    fmt, headers, rows, colwidths, colaligns, is_multiline, rowaligns, plan=None
+):
+    """Yield the plain-text representation of the table line by line.
 
-    if fmt.linebelow and "linebelow" not in hidden:
-        _append_line(lines, padded_widths, colaligns, fmt.linebelow)
+    `rows` may be any iterable, it is consumed only once. Nothing is yielded
+    for a completely empty table. `plan` is a _FormatPlan made for the same
+    format, widths and alignments, if one is at hand.
+    """
+    no_rows = object()
+    rows = iter(rows)
+    first_row = next(rows, no_rows)
+    if not headers and first_row is no_rows:
+        return
 
-    if headers or rows:
-        output = "\n".join(lines)
-        if fmt.lineabove == _html_begin_table_without_header:
-            return JupyterHTMLStr(output)
+    if plan is None:
+        plan = _make_format_plan(
+            fmt, bool(headers), colwidths, colaligns, is_multiline)
+    padded_widths = plan.padded_widths
+    pad_row = plan.pad_row
+    append_row = plan.append_row
+
+    padded_headers = pad_row(headers)
+
+    if plan.lineabove is not None:
+        yield plan.lineabove
+
+    if padded_headers:
+        yield from append_row([], padded_headers, padded_widths, colaligns, plan.headerrow)
+        if plan.linebelowheader is not None:
+            yield plan.linebelowheader
+
+    if first_row is not no_rows:
+        padded_rows = map(pad_row, chain([first_row], rows))
+        if plan.linebetweenrows is not None:
+            # initial rows with a line below; like zip(), stop taking rows
+            # once the row alignments are exhausted
+            ralign_iter = iter(rowaligns)
+            last_row = next(padded_rows)
+            for row in padded_rows:
+                ralign = next(ralign_iter, no_rows)
+                if ralign is not no_rows:
+                    yield from append_row(
+                        [],
+                        last_row,
+                        padded_widths,
+                        colaligns,
+                        plan.datarow,
+                        rowalign=ralign,
+                    )
+                    yield plan.linebetweenrows
+                last_row = row
+            # the last row without a line below
+            yield from append_row(
+                [],
+                last_row,
+                padded_widths,
+                colaligns,
+                plan.datarow,
+                rowalign=rowaligns[-1],
+            )
         else:
-            return output
-    else:  # a completely empty table
-        return ""
+            for row in padded_rows:
+                # test to see if either the 1st column or the 2nd column (account for showindex) has
+                # the SEPARATING_LINE flag
+                if _is_separating_line(row):
+                    yield plan.separating_line
+                else:
+                    yield from append_row(
+                        [], row, padded_widths, colaligns, plan.datarow
+                    )
+
+    if plan.linebelow is not None:
+        yield plan.linebelow
 
 
 class _CustomTextWrap(textwrap.TextWrapper):
@@ -2429,15 +5230,16 @@ class _CustomTextWrap(textwrap.TextWrapper):
         self.max_lines = None  # For python2 compatibility
         textwrap.TextWrapper.__init__(self, *args, **kwargs)
 
+    def wrap(self, text):
+        # the colors of the text wrapped last don't carry over
+        self._active_codes = []
+        return textwrap.TextWrapper.wrap(self, text)
+
     @staticmethod
     def _len(item):
         """Custom len that gets console column width for wide
         and non-wide characters as well as ignores color codes"""
-        stripped = _strip_ansi(item)
-        if wcwidth:
-            return wcwidth.wcswidth(stripped)
-        else:
-            return len(stripped)
+        return _wcswidth(_strip_ansi(item))
 
     def _update_lines(self, lines, new_line):
         """Adds a new line to the list of lines the text is being wrapped into
@@ -2619,6 +5421,24 @@ class _CustomTextWrap(textwrap.TextWrapper):
         return lines
 
 
+class _PlainTextWrap(_CustomTextWrap):
+    """_CustomTextWrap for text without ANSI codes: there are no codes to
+    strip from the chunks or to carry over to the next line."""
+
+    @staticmethod
+    def _len(item):
+        return _cached_width(False, True, item)
+
+    def _update_lines(self, lines, new_line):
+        lines.append(new_line)
+
+
+class _AsciiTextWrap(_PlainTextWrap):
+    """_CustomTextWrap for printable ASCII text, where widths are lengths."""
+
+    _len = staticmethod(len)
+
+
 def _main():
     """\
     Usage: tabulate [options] [FILE ...]
@@ -2635,6 +5455,14 @@ def _main():
     -1, --header              use the first row of data as a table header
     -o FILE, --output FILE    print table to FILE (default: stdout)
     -s REGEXP, --sep REGEXP   use a custom column separator (default: whitespace)
+    --csv                     read comma-separated values (with the csv module)
+    --tsv                     read tab-separated values (with the csv module)
+    --stream                  print big files with bounded memory: read them
+                              twice, once for the column widths, then row by
+                              row (standard input is copied to a temporary file)
+    -j N, --jobs N            render up to N files at a time in parallel, 0 for
+                              one per CPU; they are printed in the given order
+                              (default: 1)
     -F FPFMT, --float FPFMT   floating point number format (default: g)
     -I INTFMT, --int INTFMT   integer point number format (default: "")
     -f FMT, --format FMT      set output table format; supported formats:
@@ -2651,9 +5479,10 @@ def _main():
     try:
         opts, args = getopt.getopt(
             sys.argv[1:],
-            "h1o:s:F:A:f:",
+            "h1o:s:F:A:f:j:",
             ["help", "header", "output", "sep=",
-                "float=", "int=", "align=", "format="],
+                "float=", "int=", "align=", "format=", "csv", "tsv", "stream",
+                "jobs="],
         )
     except getopt.GetoptError as e:
         print(e)
@@ -2665,6 +5494,9 @@ def _main():
     colalign = None
     tablefmt = "simple"
     sep = r"\s+"
+    delimiter = None
+    stream = False
+    jobs = 1
     outfile = "-"
     for opt, value in opts:
         if opt in ["-1", "--header"]:
@@ -2685,54 +5517,405 @@ def _main():
             tablefmt = value
         elif opt in ["-s", "--sep"]:
             sep = value
+        elif opt == "--csv":
+            delimiter = ","
+        elif opt == "--tsv":
+            delimiter = "\t"
+        elif opt == "--stream":
+            stream = True
+        elif opt in ["-j", "--jobs"]:
+            try:
+                jobs = int(value)
+            except ValueError:
+                jobs = -1
+            if jobs < 0:
+                print("%s is not a number of jobs" % value)
+                print(usage)
+                sys.exit(2)
+            jobs = jobs or os.cpu_count() or 1
         elif opt in ["-h", "--help"]:
             print(usage)
             sys.exit(0)
     files = [sys.stdin] if not args else args
+    options = dict(
+        headers=headers,
+        tablefmt=tablefmt,
+        sep=sep,
+        floatfmt=floatfmt,
+        intfmt=intfmt,
+        colalign=colalign,
+        delimiter=delimiter,
+    )
     with (sys.stdout if outfile == "-" else open(outfile, "w")) as out:
-        for f in files:
-            if f == "-":
-                f = sys.stdin
-            if _is_file(f):
-                _pprint_file(
-                    f,
-                    headers=headers,
-                    tablefmt=tablefmt,
-                    sep=sep,
-                    floatfmt=floatfmt,
-                    intfmt=intfmt,
-                    file=out,
-                    colalign=colalign,
-                )
-            else:
-                with open(f) as fobj:
-                    _pprint_file(
-                        fobj,
-                        headers=headers,
-                        tablefmt=tablefmt,
-                        sep=sep,
-                        floatfmt=floatfmt,
-                        intfmt=intfmt,
-                        file=out,
-                        colalign=colalign,
-                    )
+        if jobs > 1 and len(files) > 1:
+            _pprint_files_parallel(files, out, stream, options, jobs)
+        else:
+            for f in files:
+                _pprint_path(f, out, stream, options)
 
 
-def _pprint_file(fobject, headers, tablefmt, sep, floatfmt, intfmt, file, colalign):
-    rows = fobject.readlines()
-    table = [re.split(sep, r.rstrip()) for r in rows if r.strip()]
-    print(
-        tabulate(
-            table,
-            headers,
-            tablefmt,
-            floatfmt=floatfmt,
-            intfmt=intfmt,
-            colalign=colalign,
-        ),
+def _pprint_path(f, out, stream, options):
+    """Print the table in a file (a name, "-" or sys.stdin) to `out`.
+
+    `options` are those of _pprint_file (or of _pprint_file_stream if
+    `stream` is true) but the file.
+    """
+    import sys
+
+    if f == "-":
+        f = sys.stdin
+    pprint_file = _pprint_file_stream if stream else _pprint_file
+    if _is_file(f):
+        if stream:
+            f = f.buffer
+        pprint_file(f, file=out, **options)
+    elif stream:
+        # the streaming reader decodes the bytes itself
+        with open(f, "rb") as fobj:
+            pprint_file(fobj, file=out, **options)
+    else:
+        # the csv module does its own newline handling
+        with open(f, newline="" if options.get("delimiter") else None) as fobj:
+            pprint_file(fobj, file=out, **options)
+
+
+def _pprint_files_parallel(files, out, stream, options, jobs):
+    """Print the tables in many files, rendered by `jobs` processes.
+
+    The tables are printed in the order of `files`, each as soon as it and
+    those before it are done. Standard input is read by this process.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    rendered = []
+    taken = 0  # the number of futures whose results were taken
+    try:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            rendered = [
+                None if f == "-" or _is_file(f)
+                else pool.submit(_render_file, f, stream, options)
+                for f in files
+            ]
+            try:
+                for f, future in zip(files, rendered):
+                    taken += 1
+                    if future is None:
+                        out.flush()
+                        _pprint_path(f, out, stream, options)
+                    elif stream:
+                        # the table is in a temporary file, not in memory
+                        _copy_rendered_file(future.result(), out)
+                    else:
+                        out.write(future.result())
+            except BaseException:
+                for future in rendered[taken:]:
+                    if future is not None:
+                        future.cancel()
+                raise
+    finally:
+        # the pool is shut down, so the futures left are done or cancelled
+        if stream:
+            for future in rendered[taken:]:
+                _remove_rendered_file(future)
+
+
+def _remove_rendered_file(future):
+    "Remove the temporary file of a _render_file future which wasn't copied."
+    if future is None or future.cancelled() or future.exception() is not None:
+        return
+    try:
+        os.remove(future.result())
+    except OSError:
+        pass
+
+
+def _render_file(filename, stream, options):
+    """Render the table in a file for _pprint_files_parallel.
+
+    Return the text printed by _pprint_path, or with `stream` the name of
+    a temporary file which holds it.
+    """
+    import tempfile
+
+    if stream:
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as out:
+            try:
+                _pprint_path(filename, out, stream, options)
+            except BaseException:
+                out.close()
+                os.remove(out.name)
+                raise
+        return out.name
+    out = io.StringIO()
+    _pprint_path(filename, out, stream, options)
+    return out.getvalue()
+
+
+def _copy_rendered_file(filename, out):
+    "Write out a temporary file of _render_file and remove it."
+    import shutil
+
+    try:
+        with open(filename) as rendered:
+            shutil.copyfileobj(rendered, out)
+    finally:
+        os.remove(filename)
+
+
+def _pprint_file(
+    fobject, headers, tablefmt, sep, floatfmt, intfmt, file, colalign, delimiter=None
+):
+    if delimiter is None:
+        rows = fobject.readlines()
+        table = [re.split(sep, r.rstrip()) for r in rows if r.strip()]
+    else:
+        import csv
+
+        table = [r for r in csv.reader(fobject, delimiter=delimiter) if r]
+    tabulate(
+        table,
+        headers,
+        tablefmt,
+        floatfmt=floatfmt,
+        intfmt=intfmt,
+        colalign=colalign,
         file=file,
     )
 
 
+# The number of rows _pprint_file_stream reads into memory at a time.
+_STREAM_CHUNK_ROWS = 10000
+
+
+def _pprint_file_stream(
+    fobject,
+    headers,
+    tablefmt,
+    sep,
+    floatfmt,
+    intfmt,
+    file,
+    colalign,
+    delimiter=None,
+    encoding=None,
+):
+    """Print a table from a binary file like _pprint_file, in bounded memory.
+
+    The file is read twice. The first pass finds the type of every column
+    and the few values which make it as wide as it is; the second one prints
+    the rows one by one in the columns laid out for those values. The output
+    is the same as that of _pprint_file. A file which can't be memory-mapped
+    (a pipe) is copied to a temporary file during the first pass.
+    """
+    import locale
+
+    if encoding is None:
+        encoding = locale.getpreferredencoding(False)
+    data = _map_file(fobject)
+    if data is None:  # an empty file
+        tabulate(
+            [], headers, tablefmt, floatfmt=floatfmt, intfmt=intfmt,
+            colalign=colalign, file=file,
+        )
+        return
+    try:
+        records = partial(
+            _iter_records, data, encoding=encoding, sep=sep, delimiter=delimiter
+        )
+        table, start = _scan_records(
+            data, records, headers, tablefmt, floatfmt, intfmt, colalign
+        )
+        lines = _iter_fixed_width_table(
+            table, records(start), chunk_size=_STREAM_CHUNK_ROWS
+        )
+        _write_lines(file, lines)
+    finally:
+        data.close()
+
+
+def _map_file(fobject):
+    """A read-only memory map of a binary file, or None if it is empty.
+
+    If the file can't be mapped, it is copied to a temporary file first.
+    """
+    import mmap
+    import shutil
+    import tempfile
+
+    try:
+        return mmap.mmap(fobject.fileno(), 0, access=mmap.ACCESS_READ)
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        pass  # not a file on disk
+    except ValueError:  # an empty file can't be mapped
+        return None
+    with tempfile.TemporaryFile() as copy:
+        shutil.copyfileobj(fobject, copy)
+        copy.flush()
+        if not copy.tell():
+            return None
+        return mmap.mmap(copy.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _iter_records(data, start=0, encoding="utf-8", sep=r"\s+", delimiter=None):
+    """Yield the rows of a text table in a binary file from byte `start` on.
+
+    Rows are split on the regular expression `sep`, or by the `csv` module
+    on `delimiter` if it is given; blank lines are skipped. Lines are read
+    only as they are needed: the position of the file is just after the
+    last row yielded.
+    """
+    data.seek(start)
+    lines = (line.decode(encoding) for line in iter(data.readline, b""))
+    if delimiter is None:
+        return (re.split(sep, line.rstrip()) for line in lines if line.strip())
+    else:
+        import csv
+
+        return (row for row in csv.reader(lines, delimiter=delimiter) if row)
+
+
+def _scan_records(data, records, headers, tablefmt, floatfmt, intfmt, colalign):
+    """Find the columns of a table streamed by `records` (see _iter_records).
+
+    Return _FixedWidthColumns in which every row of the table looks the
+    same as in `tabulate`, and the position of the first row after the
+    headers. The rows are read a chunk at a time; for every column and
+    chunk only the values with the widest formatted integer and decimal
+    parts (or the widest values, if the column isn't aligned on the decimal
+    point) are kept. The column widths and decimal points of all the rows
+    are those of the table of these few values. A chunk is read again for
+    the columns which turn out to be of a more generic type than in the
+    chunk, or which it doesn't have.
+    """
+    rows = records()
+    if headers == "firstrow":
+        headers = list(map(str, next(rows, [])))
+    start = data.tell()
+
+    numparse = tablefmt != "pretty"
+    numalign, stralign = _default_aligns(tablefmt, _DEFAULT_ALIGN, _DEFAULT_ALIGN)
+    multiline_ok = tablefmt in multiline_formats
+
+    def alignment(col, coltype):
+        if colalign is not None and col < len(colalign):
+            return colalign[col]
+        return numalign if coltype in [int, float] else stralign
+
+    def columns(chunk, ncols=0):
+        chunk = [row for row in chunk if not _is_separating_line(row)]
+        ncols = max(ncols, max(map(len, chunk), default=0))
+        cols = [[row[i] if i < len(row) else None for row in chunk]
+                for i in range(ncols)]
+        if tablefmt == "rst":
+            cols = _rst_escape_first_column(cols, [])[0]
+        return cols
+
+    def keep_widest(col, values, coltype):
+        # the widest values of the column, by type
+        widest = widest_values[col].setdefault(coltype, {})
+        align = alignment(col, coltype)
+        found = _widest_values(
+            values, coltype, align, floatfmt, intfmt, multiline_ok)
+        for key, (size, value) in found.items():
+            if key not in widest or widest[key][0] < size:
+                widest[key] = (size, value)
+
+    first_row = None
+    genericities = []
+    widest_values = []
+    chunk_types = []  # the position and the column types of every chunk
+    multiline_value = None
+    while True:
+        position = data.tell()
+        chunk = list(islice(rows, _STREAM_CHUNK_ROWS))
+        if not chunk:
+            break
+        if first_row is None:
+            first_row = chunk[0]
+        cols = columns(chunk)
+        coltypes = [_parse_column(c, True, numparse)[0] for c in cols]
+        chunk_types.append((position, coltypes))
+        for col, (values, coltype) in enumerate(zip(cols, coltypes)):
+            if col == len(genericities):
+                genericities.append(_type_genericity[bool])
+                widest_values.append({})
+            genericities[col] = max(genericities[col], _type_genericity[coltype])
+            try:
+                keep_widest(col, values, coltype)
+            except ValueError:
+                # e.g. "True" in a float column, which tabulate can't format;
+                # the column may still turn out to be of another type
+                coltypes[col] = None
+            if multiline_ok and multiline_value is None:
+                if _find_invisible_and_multiline(values)[1]:
+                    multiline_value = col, next(
+                        v for v in values if v is not None and _is_multiline(v)
+                    )
+
+    ncols = len(genericities)
+    coltypes = [_generic_types[g] for g in genericities]
+    for position, types in chunk_types:
+        stale = [
+            col
+            for col, coltype in enumerate(coltypes)
+            if col >= len(types) or types[col] is not coltype
+        ]
+        if stale:
+            cols = columns(islice(records(position), _STREAM_CHUNK_ROWS), ncols)
+            for col in stale:
+                keep_widest(col, cols[col], coltypes[col])
+
+    # the first row decides the number of headers, like in tabulate
+    sample = [first_row] if first_row and not _is_separating_line(first_row) else []
+    col_values = [
+        [value for _, value in widest_values[col][coltype].values()]
+        for col, coltype in enumerate(coltypes)
+    ]
+    if multiline_value is not None:
+        col_values[multiline_value[0]].append(multiline_value[1])
+    for i in range(max(map(len, col_values), default=0)):
+        sample.append([values[min(i, len(values) - 1)] for values in col_values])
+
+    table = _sampled_columns(
+        sample,
+        headers,
+        tablefmt,
+        floatfmt=floatfmt,
+        intfmt=intfmt,
+        colalign=colalign,
+        coltypes=coltypes,
+    )
+    return table, start
+
+
+def _widest_values(values, coltype, align, floatfmt, intfmt, multiline_ok):
+    """The values of a column which make it as wide as it is.
+
+    Return {criterion: (size, value)}: for a column aligned on the decimal
+    point, the value with the widest part before the point and the one
+    with the most decimals; for any other column, the widest value.
+    """
+    has_invisible, is_multiline = _find_invisible_and_multiline(values)
+    strings, decimals = _format_column(
+        values, coltype, None, floatfmt, intfmt, _DEFAULT_MISSINGVAL,
+        has_invisible, align == "decimal",
+    )
+    width_fn = _choose_width_fn(
+        has_invisible,
+        current_settings().wide_chars_mode
+        and not _all_printable_ascii(strings),
+        multiline_ok and is_multiline,
+    )
+    if decimals is None:
+        strings, _ = _align_column_choose_padfn(strings, align, has_invisible)
+        widths = list(map(width_fn, strings))
+        i = max(range(len(values)), key=widths.__getitem__)
+        return {"width": (widths[i], values[i])}
+    integers = [width_fn(s) - decs for s, decs in zip(strings, decimals)]
+    i = max(range(len(values)), key=integers.__getitem__)
+    j = max(range(len(values)), key=decimals.__getitem__)
+    return {"integer": (integers[i], values[i]), "decimals": (decimals[j], values[j])}
+
+
 if __name__ == "__main__":
     _main()